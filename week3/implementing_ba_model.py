@@ -1,4 +1,6 @@
 from __future__ import print_function
+from multiprocessing import Pool
+
 import networkx as nx
 import numpy as np
 import matplotlib.pyplot as plt
@@ -27,11 +29,17 @@ def ba_network(n, m, seedsize=3):
     
     # list of nodes to select from,
     # each node appear as frequent as the number of degree
-    node_pool = list(net.node) + list(net.node)
+    node_pool = list(net.nodes()) + list(net.nodes())
     next_node = seedsize # initialize the next node
     while next_node < n:
         # randomly select m nodes from existing nodes ?
-        targets = np.random.choice(node_pool, m, replace=False)
+        # (m distinct positions of the pool, drawn one at a time: the same
+        # as np.random.choice(node_pool, m, replace=False), which would
+        # shuffle the whole pool at every step)
+        positions = set()
+        while len(positions) < m:
+            positions.add(np.random.randint(len(node_pool)))
+        targets = [node_pool[i] for i in positions]
         # attached next node to the randomly selected #m target(s)
         net.add_edges_from(zip([next_node]*m, targets))
 
@@ -43,6 +51,134 @@ def ba_network(n, m, seedsize=3):
 
     return net
 
+def generate_network(model, params, seed=None):
+    """
+    Builds a single realization of one of the supported network models.
+
+    Parameters
+    ----------
+    model : str
+      'ba', 'er' or 'ws'
+    params : dict
+      keyword arguments of the generator:
+        'ba': n, m (and optionally seedsize), see ba_network
+        'er': n, p, see nx.fast_gnp_random_graph
+        'ws': n, k, p, see nx.watts_strogatz_graph
+    seed : int, optional
+      seed of the random number generators used by the generator
+
+    Returns
+    -------
+    net : networkx.Graph object
+    """
+    if seed is not None:
+        np.random.seed(seed)
+    if model == 'ba':
+        return ba_network(**params)
+    if model == 'er':
+        return nx.fast_gnp_random_graph(seed=seed, **params)
+    if model == 'ws':
+        return nx.watts_strogatz_graph(seed=seed, **params)
+    raise ValueError("unknown network model: %s" % model)
+
+def _degree_histogram(args):
+    """
+    Worker of ensemble_degree_distribution: builds one realization and
+    folds its degree sequence into per-bin counts, so that only a few
+    arrays of length len(bins)-1 leave the worker.
+
+    Parameters
+    ----------
+    args : tuple
+      (model, params, bins, seed)
+
+    Returns
+    -------
+    counts : np.array of ints
+      number of nodes whose degree falls into each bin
+    degree_sums : np.array of ints
+      sum of the degrees of those nodes
+    n_nodes : int
+      number of nodes in the realization
+    """
+    model, params, bins, seed = args
+    net = generate_network(model, params, seed)
+    degrees = np.fromiter((deg for _, deg in net.degree()), dtype=np.int64,
+                          count=net.number_of_nodes())
+    counts, _ = np.histogram(degrees, bins=bins)
+    degree_sums, _ = np.histogram(degrees, bins=bins, weights=degrees)
+    return counts, degree_sums.astype(np.int64), len(degrees)
+
+def ensemble_degree_distribution(model, params, n_realizations, bins,
+                                 n_workers=None, seed=None, chunksize=4):
+    """
+    Estimates the degree distribution P(k) of a network model as an average
+    over many realizations. The realizations are generated in parallel, and
+    each degree sequence is folded into running lin-log histogram counts as
+    soon as it arrives, so memory use does not grow with n_realizations.
+
+    Parameters
+    ----------
+    model : str
+      'ba', 'er' or 'ws', see generate_network
+    params : dict
+      parameters of the generator, see generate_network
+    n_realizations : int
+      number of realizations in the ensemble
+    bins : np.array
+      bin edges, e.g. from lin_log_bins. Degrees outside the bins are ignored.
+    n_workers : int, optional
+      number of worker processes, defaults to the number of CPUs.
+      With n_workers=1 everything runs in the calling process.
+    seed : int, optional
+      seed from which the seeds of the individual realizations are drawn
+    chunksize : int
+      number of realizations handed to a worker at a time
+
+    Returns
+    -------
+    bincenters : np.array
+      mean degree of the nodes in each bin (nan for empty bins)
+    pk : np.array
+      ensemble average of the density-normalised P(k) in each bin
+    pk_err : np.array
+      standard error of the mean of pk over the realizations
+    """
+    bins = np.asarray(bins, dtype=float)
+    widths = np.diff(bins)
+    realization_seeds = np.random.RandomState(seed).randint(
+        0, 2**31 - 1, size=n_realizations)
+    tasks = ((model, params, bins, int(s)) for s in realization_seeds)
+
+    total_counts = np.zeros(len(widths), dtype=np.int64)
+    total_degrees = np.zeros(len(widths), dtype=np.int64)
+    pk_sum = np.zeros(len(widths))
+    pk_sq_sum = np.zeros(len(widths))
+
+    def fold(results):
+        for counts, degree_sums, n_nodes in results:
+            total_counts[:] += counts
+            total_degrees[:] += degree_sums
+            pk_r = counts / (float(n_nodes) * widths)
+            pk_sum[:] += pk_r
+            pk_sq_sum[:] += pk_r**2
+
+    if n_workers == 1:
+        fold(map(_degree_histogram, tasks))
+    else:
+        with Pool(n_workers) as pool:
+            fold(pool.imap_unordered(_degree_histogram, tasks, chunksize))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bincenters = total_degrees / total_counts.astype(float)
+    pk = pk_sum / n_realizations
+    if n_realizations > 1:
+        variance = (pk_sq_sum - n_realizations * pk**2) / (n_realizations - 1)
+        pk_err = np.sqrt(np.maximum(variance, 0) / n_realizations)
+    else:
+        pk_err = np.zeros(len(widths))
+    return bincenters, pk, pk_err
+
 # =========================== MAIN CODE BELOW ==============================
 
 if __name__ == "__main__":
@@ -100,3 +236,26 @@ if __name__ == "__main__":
     fig.savefig(figure_filename)
 
     # or just use plt.show() and save manually
+
+    # ensemble average of part b over many realizations
+    n_realizations = 1000
+    bins = lin_log_bins(10000)
+    bincenters, pk, pk_err = ensemble_degree_distribution(
+        'ba', {'n': 10000, 'm': 2}, n_realizations, bins, seed=42)
+
+    fig = plt.figure()
+    ax = fig.add_subplot(111)
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.errorbar(bincenters, pk, yerr=pk_err, fmt='ro',
+                label='Simulated (%d realizations)' % n_realizations)
+    ax.plot(bins, 2 * 2 * (2 + 1) /
+            (bins * (bins + 1) * (bins + 2)),
+            label='Theoretical')
+    ax.set_xlabel('Degree k')
+    ax.set_ylabel('P(k)')
+    ax.legend()
+
+    figure_filename = 'BA_degree_distribution_ensemble.pdf'
+
+    fig.savefig(figure_filename)
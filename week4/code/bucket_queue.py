@@ -0,0 +1,111 @@
+"""
+Bucket priority queue for items whose priorities change, e.g. edges ranked by
+the product of the degrees of their end points during an attack.
+
+Items with the same priority share a bucket, and a heap holds the distinct
+priorities, so an item can be moved to another bucket in O(1) and the maximum
+is found without touching the other items. Priorities that are no longer in
+use are dropped from the heap lazily. When the priorities are small integers
+(degrees, degree products) the number of buckets stays small.
+
+Usage:
+
+queue = make_queue()
+push(queue, item, priority)
+update(queue, item, new_priority)
+item, priority = pop_max(queue)
+n_items = len(queue['priority'])
+"""
+import heapq
+
+
+def make_queue():
+    """
+    Creates an empty queue.
+
+    Returns
+    -------
+    queue : dict
+      'buckets' maps a priority to a dict of the items having it (a dict is
+      used as an insertion-ordered set), 'heap' holds the negated priorities
+      and 'priority' maps each item to its current priority.
+    """
+    return {'buckets': {}, 'heap': [], 'priority': {}}
+
+
+def push(queue, item, priority):
+    """
+    Inserts item with the given priority. The item must not be in the queue.
+
+    Parameters
+    ----------
+    queue : dict, see make_queue
+    item : hashable
+    priority : number
+    """
+    bucket = queue['buckets'].get(priority)
+    if bucket is None:
+        bucket = queue['buckets'][priority] = {}
+        heapq.heappush(queue['heap'], -priority)
+    bucket[item] = None
+    queue['priority'][item] = priority
+
+
+def remove(queue, item):
+    """
+    Removes item from the queue if it is there.
+
+    Parameters
+    ----------
+    queue : dict, see make_queue
+    item : hashable
+    """
+    priority = queue['priority'].pop(item, None)
+    if priority is None:
+        return
+    bucket = queue['buckets'][priority]
+    del bucket[item]
+    if not bucket:
+        del queue['buckets'][priority]
+
+
+def update(queue, item, priority):
+    """
+    Changes the priority of item, which must be in the queue.
+
+    Parameters
+    ----------
+    queue : dict, see make_queue
+    item : hashable
+    priority : number
+    """
+    if queue['priority'][item] != priority:
+        remove(queue, item)
+        push(queue, item, priority)
+
+
+def pop_max(queue):
+    """
+    Removes and returns an item with the highest priority. Among items with
+    equal priority the most recently inserted one is returned.
+
+    Parameters
+    ----------
+    queue : dict, see make_queue
+
+    Returns
+    -------
+    item : hashable
+    priority : number
+    """
+    heap = queue['heap']
+    buckets = queue['buckets']
+    while -heap[0] not in buckets:
+        heapq.heappop(heap)
+    priority = -heap[0]
+    bucket = buckets[priority]
+    item, _ = bucket.popitem()
+    if not bucket:
+        del buckets[priority]
+    del queue['priority'][item]
+    return item, priority
@@ -11,14 +11,19 @@
 # write your own code. When you successfully modified the code in that part,
 # remove the `raise` command.
 from __future__ import print_function
+from multiprocessing import Pool
 import random
 import os
 
 import networkx as nx
 import numpy as np
 import matplotlib.pyplot as plt
+import scipy.optimize
+import scipy.sparse
 import scipy.stats
 
+import union_find
+
 # ====================== FUNCTIONS USED BY THE MAIN CODE ===================
 #
 # ====================== FOR THE MAIN CODE SCROLL TO THE BOTTOM ============
@@ -170,6 +175,137 @@ def create_er_network(net_size, avg_degree):
     net = nx.fast_gnp_random_graph(n=net_size, p=p)
     return net
 
+def er_edge_arrays(net_size, p, seed=None, block_size=2**22):
+    """Draws the edges of an Erdos-Renyi network G(net_size, p) without
+    looking at every node pair.
+
+    The node pairs (v, w), w < v, are enumerated in the order
+    L = v*(v-1)/2 + w, and the gaps between consecutive edges in this order
+    are geometrically distributed. The gaps are drawn in vectorized blocks of
+    block_size and the resulting pair indices are converted back to end
+    points, so the cost is proportional to the number of edges.
+
+    Parameters
+    ----------
+    net_size : int
+       Number of nodes in the network.
+    p : float
+       Edge probability.
+    seed : int or np.random.RandomState, optional
+       Seed or random state used for drawing the edges.
+    block_size : int
+       Maximum number of gaps drawn at a time.
+
+    Returns
+    -------
+    sources, targets : np.arrays of ints
+       The end points of the edges, sources[i] > targets[i]. The edges are
+       sorted by source and then by target. The arrays are int32 unless
+       the node indices do not fit in it.
+    """
+    rng = seed if isinstance(seed, np.random.RandomState) else np.random.RandomState(seed)
+    index_dtype = np.int32 if net_size < 2**31 else np.int64
+    n_pairs = net_size * (net_size - 1) // 2
+    if p <= 0 or n_pairs == 0:
+        return np.zeros(0, dtype=index_dtype), np.zeros(0, dtype=index_dtype)
+
+    expected_edges = p * n_pairs
+    block = int(min(block_size, expected_edges + 10 * np.sqrt(expected_edges) + 100))
+    pair_blocks = []
+    last_pair = -1
+    while last_pair < n_pairs:
+        pairs = last_pair + np.cumsum(rng.geometric(min(p, 1.0), size=block))
+        last_pair = pairs[-1]
+        if last_pair >= n_pairs:
+            pairs = pairs[:np.searchsorted(pairs, n_pairs)]
+        pair_blocks.append(pairs)
+    pairs = np.concatenate(pair_blocks)
+
+    # invert L = v*(v-1)/2 + w, fixing the rounding errors of the square root
+    sources = np.floor((1 + np.sqrt(1 + 8 * pairs.astype(np.float64))) / 2).astype(np.int64)
+    targets = pairs - sources * (sources - 1) // 2
+    too_large = targets < 0
+    sources[too_large] -= 1
+    too_small = targets >= sources
+    sources[too_small] += 1
+    targets = pairs - sources * (sources - 1) // 2
+    return sources.astype(index_dtype), targets.astype(index_dtype)
+
+
+def edge_arrays_to_csr(net_size, sources, targets, dtype=np.int32):
+    """Builds the symmetric adjacency matrix of an undirected network from
+    the output of er_edge_arrays, directly in CSR form.
+
+    Parameters
+    ----------
+    net_size : int
+       Number of nodes in the network.
+    sources, targets : np.arrays of ints
+       Edge end points with sources[i] > targets[i], sorted by source.
+    dtype : numpy dtype
+       Type of the stored ones.
+
+    Returns
+    -------
+    adjacency : scipy.sparse.csr_matrix of shape (net_size, net_size)
+       The column indices within each row are sorted.
+    """
+    n_edges = len(sources)
+    index_dtype = np.int32 if 2 * n_edges < 2**31 and net_size < 2**31 else np.int64
+    lower_degree = np.bincount(sources, minlength=net_size)
+    upper_degree = np.bincount(targets, minlength=net_size)
+    indptr = np.zeros(net_size + 1, dtype=index_dtype)
+    np.cumsum(lower_degree + upper_degree, out=indptr[1:])
+    indices = np.empty(2 * n_edges, dtype=index_dtype)
+
+    # each row lists first its smaller neighbors, which are already grouped
+    # by row and sorted in the sources array ...
+    lower_start = np.zeros(net_size, dtype=np.int64)
+    np.cumsum(lower_degree[:-1], out=lower_start[1:])
+    rank = np.arange(n_edges) - lower_start[sources]
+    indices[indptr[sources] + rank] = targets
+
+    # ... and then its larger neighbors, grouped with a stable sort
+    order = np.argsort(targets, kind='stable')
+    rows = targets[order]
+    upper_start = np.zeros(net_size, dtype=np.int64)
+    np.cumsum(upper_degree[:-1], out=upper_start[1:])
+    rank = np.arange(n_edges) - upper_start[rows]
+    indices[indptr[rows] + lower_degree[rows] + rank] = sources[order]
+
+    data = np.ones(2 * n_edges, dtype=dtype)
+    return scipy.sparse.csr_matrix((data, indices, indptr),
+                                   shape=(net_size, net_size))
+
+
+def create_er_csr(net_size, avg_degree, n_realizations=None, seed=None):
+    """Creates realisations of an Erdos-Renyi network as sparse adjacency
+    matrices, without building networkx objects. The edge probability is set
+    as in create_er_network.
+
+    Parameters
+    ----------
+    net_size : int
+       Number of nodes in the network.
+    avg_degree : float
+       The expected average degree in the network.
+    n_realizations : int, optional
+       If given, a list of this many independent realisations is returned.
+    seed : int, optional
+       Seed of the random number generator.
+
+    Returns
+    -------
+    adjacency : scipy.sparse.csr_matrix, or a list of them
+    """
+    p = avg_degree / (net_size)
+    rng = np.random.RandomState(seed)
+    if n_realizations is None:
+        return edge_arrays_to_csr(net_size, *er_edge_arrays(net_size, p, rng))
+    return [edge_arrays_to_csr(net_size, *er_edge_arrays(net_size, p, rng))
+            for _ in range(n_realizations)]
+
+
 def ER_percolation(N, maxk, stepsize=0.1):
     """Builds ER networks with average degrees from 0 to maxk and
        plots the size of the largest connected component and susceptibility
@@ -208,9 +344,29 @@ def ER_percolation(N, maxk, stepsize=0.1):
         # Calculate the avg component size for the other components
         smallsize.append(get_susceptibility(component_size_dist))
 
+    # plot the numbers
+    return plot_percolation(klist, giantsize, smallsize, N)
 
 
-    # plot the numbers
+def plot_percolation(klist, giantsize, smallsize, N):
+    """Plots the size of the largest connected component and the
+       susceptibility as a function of the average degree.
+
+    Parameters
+    ----------
+    klist : list-like
+      Average degrees
+    giantsize : list-like
+      Size of the largest component at each average degree
+    smallsize : list-like
+      Susceptibility at each average degree
+    N : int
+      Number of nodes in the network (used in the title)
+
+    Returns
+    -------
+    fig : figure handle
+    """
     fig = plt.figure()
     ax = fig.add_subplot(2, 1, 1)
 
@@ -229,6 +385,317 @@ def ER_percolation(N, maxk, stepsize=0.1):
     return fig
 
 
+def percolation_sweep(N, n_edges, seed=None, chunk_size=2**16):
+    """Adds n_edges uniformly random edges one by one to N isolated nodes
+       (Newman-Ziff algorithm) and records the size of the largest component
+       and the susceptibility after every added edge.
+
+       The components are kept in a weighted union-find, and the largest
+       component size and the sum of squared component sizes are updated in
+       O(1) per edge, so the whole curve costs about as much as a single
+       call to get_component_size_dist. After m edges the network is an ER
+       network with average degree 2m/N (self-loops and multi-edges, which are
+       rare for sparse networks, do not change the components).
+
+    Parameters
+    ----------
+    N : int
+      Number of nodes
+    n_edges : int
+      Number of edges to add
+    seed : int, optional
+      Seed of the random edge sequence
+    chunk_size : int
+      Number of random edges drawn at a time
+
+    Returns
+    -------
+    giantsize : np.array of ints, length n_edges+1
+      giantsize[m] is the largest component size after m edges
+    smallsize : np.array of floats, length n_edges+1
+      smallsize[m] is the susceptibility (see get_susceptibility) after m
+      edges, 0 when all nodes are in the largest component
+    """
+    rng = np.random.RandomState(seed)
+    parent, size = union_find.make_sets(N)
+    find_root = union_find.find_root
+    union = union_find.union
+    giant = 1
+    sum_sq = N  # sum of squared component sizes
+
+    giantsize = np.empty(n_edges + 1, dtype=np.int64)
+    sum_sq_list = np.empty(n_edges + 1, dtype=np.float64)
+    giantsize[0] = giant
+    sum_sq_list[0] = sum_sq
+
+    # the edges are drawn in chunks to keep the Python lists short
+    for first in range(0, n_edges, chunk_size):
+        n_chunk = min(chunk_size, n_edges - first)
+        sources = rng.randint(0, N, n_chunk).tolist()
+        targets = rng.randint(0, N, n_chunk).tolist()
+        giant_chunk = [0] * n_chunk
+        sum_sq_chunk = [0] * n_chunk
+
+        for m, (i, j) in enumerate(zip(sources, targets)):
+            root_i = find_root(parent, i)
+            root_j = find_root(parent, j)
+            if root_i != root_j:
+                # the sizes are needed before the merge for the sum of squares
+                sum_sq += 2 * size[root_i] * size[root_j]
+                merged_size = union(parent, size, root_i, root_j)
+                if merged_size > giant:
+                    giant = merged_size
+            giant_chunk[m] = giant
+            sum_sq_chunk[m] = sum_sq
+
+        giantsize[first+1:first+1+n_chunk] = giant_chunk
+        sum_sq_list[first+1:first+1+n_chunk] = sum_sq_chunk
+
+    rest = N - giantsize
+    smallsize = np.zeros(n_edges + 1)
+    has_rest = rest > 0
+    smallsize[has_rest] = ((sum_sq_list[has_rest] - giantsize[has_rest]**2.0)
+                           / rest[has_rest])
+    return giantsize, smallsize
+
+
+def ER_percolation_sweep(N, maxk, n_sequences=1, seed=None):
+    """Same figure as ER_percolation, but the curves are computed with
+       percolation_sweep at the resolution of single edges and averaged over
+       n_sequences random edge sequences.
+
+    Parameters
+    ----------
+    N : int
+      Number of nodes in the ER network
+    maxk : float
+      The maximum average degree
+    n_sequences : int
+      Number of random edge sequences to average over
+    seed : int, optional
+      Seed from which the seeds of the edge sequences are drawn
+
+    Returns
+    -------
+    fig : figure handle
+    """
+    n_edges = int(round(maxk * N / 2.0))
+    klist = 2.0 * np.arange(n_edges + 1) / N
+    giantsize = np.zeros(n_edges + 1)
+    smallsize = np.zeros(n_edges + 1)
+
+    sequence_seeds = np.random.RandomState(seed).randint(
+        0, 2**31 - 1, size=n_sequences)
+    for sequence_seed in sequence_seeds:
+        giant, small = percolation_sweep(N, n_edges, sequence_seed)
+        giantsize += giant
+        smallsize += small
+
+    giantsize /= n_sequences
+    smallsize /= n_sequences
+
+    return plot_percolation(klist, giantsize, smallsize, N)
+
+
+def _percolation_peak(args):
+    """Worker of finite_size_scaling: runs one percolation_sweep and returns
+    the curves sampled on a grid of average degrees together with the
+    location and height of the susceptibility peak.
+
+    Parameters
+    ----------
+    args : tuple
+      (N, k_grid, seed)
+
+    Returns
+    -------
+    N : int
+    giant_on_grid : np.array
+      Relative size of the largest component at the average degrees k_grid
+    susceptibility_on_grid : np.array
+      Susceptibility at the average degrees k_grid
+    k_peak : float
+      Average degree at which the susceptibility is highest
+    chi_peak : float
+      Height of the susceptibility peak
+    giant_peak : float
+      Size of the largest component at the peak
+    """
+    N, k_grid, seed = args
+    n_edges = int(round(k_grid[-1] * N / 2.0))
+    giantsize, smallsize = percolation_sweep(N, n_edges, seed)
+    grid_edges = np.minimum(np.round(k_grid * N / 2.0).astype(np.int64), n_edges)
+    peak = np.argmax(smallsize)
+    return (N, giantsize[grid_edges] / float(N), smallsize[grid_edges],
+            2.0 * peak / N, smallsize[peak], float(giantsize[peak]))
+
+
+def finite_size_scaling(sizes, n_seeds, maxk=2.5, n_grid=251, n_workers=None,
+                        seed=None):
+    """Runs percolation sweeps for several network sizes and many edge
+    sequences in parallel, locates the susceptibility peaks and fits the
+    finite-size scaling of the percolation threshold:
+
+        k_peak(N) = k_c + a * N**(-1/nu)
+        chi_peak(N) ~ N**(gamma/nu)
+        S_peak(N) ~ N**(1 - beta/nu)
+
+    where S_peak is the size of the largest component at the peak. For ER
+    networks k_c = 1 and 1/nu = gamma/nu = 1/3, 1 - beta/nu = 2/3.
+
+    Parameters
+    ----------
+    sizes : list of ints
+      Network sizes N, e.g. a geometric series
+    n_seeds : int
+      Number of edge sequences per network size
+    maxk : float
+      Maximum average degree of the sweeps
+    n_grid : int
+      Number of average degrees at which the averaged curves are returned
+    n_workers : int, optional
+      Number of worker processes, defaults to the number of CPUs
+    seed : int, optional
+      Seed from which the seeds of the edge sequences are drawn
+
+    Returns
+    -------
+    results : dict with keys
+      'sizes' : np.array of the network sizes
+      'k_grid' : np.array of average degrees
+      'giant' : array (len(sizes), n_grid) of average relative giant sizes
+      'susceptibility' : array (len(sizes), n_grid) of average susceptibilities
+      'k_peak', 'k_peak_err' : arrays of peak locations and their standard errors
+      'chi_peak', 'giant_peak' : arrays of average peak heights and giant sizes
+      'k_c', 'one_over_nu', 'gamma_over_nu', 'giant_exponent' : fitted values;
+        k_c and one_over_nu are NaN if the threshold fit is degenerate
+      'fit_cov' : (3, 3) covariance of the fitted (k_c, a, 1/nu), NaN if the
+        fit is degenerate
+    """
+    sizes = np.sort(np.asarray(sizes, dtype=np.int64))
+    k_grid = np.linspace(0, maxk, n_grid)
+    sequence_seeds = np.random.RandomState(seed).randint(
+        0, 2**31 - 1, size=(len(sizes), n_seeds))
+    # largest networks first so that the workers finish at the same time
+    tasks = [(int(N), k_grid, int(s))
+             for N, row in reversed(list(zip(sizes, sequence_seeds)))
+             for s in row]
+
+    size_index = {N: i for i, N in enumerate(sizes)}
+    giant = np.zeros((len(sizes), n_grid))
+    susceptibility = np.zeros((len(sizes), n_grid))
+    k_peaks = np.zeros((len(sizes), n_seeds))
+    chi_peaks = np.zeros((len(sizes), n_seeds))
+    giant_peaks = np.zeros((len(sizes), n_seeds))
+    n_done = np.zeros(len(sizes), dtype=np.int64)
+
+    with Pool(n_workers) as pool:
+        for N, giant_r, chi_r, k_peak, chi_peak, giant_peak in \
+                pool.imap_unordered(_percolation_peak, tasks):
+            i = size_index[N]
+            giant[i] += giant_r / n_seeds
+            susceptibility[i] += chi_r / n_seeds
+            k_peaks[i, n_done[i]] = k_peak
+            chi_peaks[i, n_done[i]] = chi_peak
+            giant_peaks[i, n_done[i]] = giant_peak
+            n_done[i] += 1
+
+    k_peak = k_peaks.mean(axis=1)
+    if n_seeds > 1:
+        k_peak_err = k_peaks.std(axis=1, ddof=1) / np.sqrt(n_seeds)
+    else:
+        k_peak_err = np.zeros(len(sizes))
+    chi_peak = chi_peaks.mean(axis=1)
+    giant_peak = giant_peaks.mean(axis=1)
+
+    def shift(N, k_c, a, one_over_nu):
+        return k_c + a * N**(-one_over_nu)
+
+    # k_c must lie within the swept average degrees and 0 < 1/nu <= 1;
+    # without bounds, noisy peaks let 1/nu go to zero while k_c and a run
+    # off in opposite directions
+    lower = (0.0, -np.inf, 1e-3)
+    upper = (maxk, np.inf, 1.0)
+    sigma = k_peak_err if np.all(k_peak_err > 0) else None
+    try:
+        params, fit_cov = scipy.optimize.curve_fit(
+            shift, sizes.astype(float), k_peak,
+            p0=(min(1.0, maxk / 2.0), 1.0, 1/3.0), sigma=sigma,
+            absolute_sigma=sigma is not None, bounds=(lower, upper),
+            maxfev=10000)
+        k_c, _, one_over_nu = params
+        # a fit stuck on a bound or with an undetermined covariance (e.g.
+        # no more sizes than parameters) does not locate the threshold
+        degenerate = (not np.all(np.isfinite(fit_cov))
+                      or np.any(np.isclose(params, lower))
+                      or np.any(np.isclose(params, upper)))
+    except (RuntimeError, TypeError, ValueError):
+        # too few sizes or no convergence
+        degenerate = True
+    if degenerate:
+        k_c, one_over_nu = np.nan, np.nan
+        fit_cov = np.full((3, 3), np.nan)
+    gamma_over_nu = np.polyfit(np.log(sizes), np.log(chi_peak), 1)[0]
+    giant_exponent = np.polyfit(np.log(sizes), np.log(giant_peak), 1)[0]
+
+    return {'sizes': sizes, 'k_grid': k_grid, 'giant': giant,
+            'susceptibility': susceptibility, 'k_peak': k_peak,
+            'k_peak_err': k_peak_err, 'chi_peak': chi_peak,
+            'giant_peak': giant_peak, 'k_c': k_c, 'one_over_nu': one_over_nu,
+            'fit_cov': fit_cov,
+            'gamma_over_nu': gamma_over_nu, 'giant_exponent': giant_exponent}
+
+
+def plot_finite_size_scaling(results):
+    """Plots the output of finite_size_scaling: the averaged giant component
+    and susceptibility curves for each network size, and the peak location
+    and height as a function of the network size.
+
+    Parameters
+    ----------
+    results : dict, see finite_size_scaling
+
+    Returns
+    -------
+    fig : figure handle
+    """
+    fig, axes = plt.subplots(ncols=2, nrows=2, figsize=(10, 8))
+    (ax1, ax2), (ax3, ax4) = axes
+    sizes = results['sizes']
+    for i, N in enumerate(sizes):
+        ax1.plot(results['k_grid'], results['giant'][i], label=f'N = {N}')
+        ax2.plot(results['k_grid'], results['susceptibility'][i])
+    ax1.set_xlabel('Average Degree')
+    ax1.set_ylabel('Relative Largest Component Size')
+    ax1.legend(loc=0)
+    ax2.set_xlabel('Average Degree')
+    ax2.set_ylabel('Susceptibility')
+
+    ax3.errorbar(sizes, results['k_peak'], yerr=results['k_peak_err'], fmt='o')
+    n_fit = np.logspace(np.log10(sizes[0]), np.log10(sizes[-1]), 100)
+    if np.isfinite(results['k_c']):
+        a = np.mean((results['k_peak'] - results['k_c'])
+                    * sizes**results['one_over_nu'])
+        ax3.plot(n_fit, results['k_c'] + a * n_fit**(-results['one_over_nu']),
+                 'k-', label='$k_c$ = %.3f, 1/$\\nu$ = %.2f'
+                 % (results['k_c'], results['one_over_nu']))
+        ax3.legend(loc=0)
+    ax3.set_xscale('log')
+    ax3.set_xlabel('Number of Nodes')
+    ax3.set_ylabel('Peak Average Degree')
+
+    ax4.loglog(sizes, results['chi_peak'], 'o',
+               label='$\\gamma/\\nu$ = %.2f' % results['gamma_over_nu'])
+    ax4.loglog(sizes, results['giant_peak'], 's',
+               label='largest component, exponent %.2f' % results['giant_exponent'])
+    ax4.set_xlabel('Number of Nodes')
+    ax4.set_ylabel('Value at Peak')
+    ax4.legend(loc=0)
+
+    fig.tight_layout()
+    return fig
+
+
 def expand_breadth_first_search(network, visited_nodes, boundary_nodes):
     """Performs one step in a breadth first search and updates the visited nodes
     and boundary nodes sets that are given as parameters accordingly. Here one
@@ -267,6 +734,80 @@ def expand_breadth_first_search(network, visited_nodes, boundary_nodes):
     # We return nothing as the results were updated to visited_nodes and boundary_nodes
 
 
+def batched_breadth_first_search(adjacency, start_nodes, max_depth,
+                                 chunk_size=1000):
+    """Runs breadth first searches from many start nodes at once and computes
+    the boundary sizes and loop edge fractions (see
+    calculate_loop_edge_fraction) at each depth.
+
+    The boundaries and visited nodes of chunk_size searches are kept as rows
+    of sparse matrices, so one step of all the searches in a chunk is a
+    single sparse matrix product with the adjacency matrix.
+
+    Parameters
+    ----------
+    adjacency : scipy.sparse.csr_matrix
+      Symmetric adjacency matrix of the network, see create_er_csr
+    start_nodes : list-like of ints
+      The start node of each search
+    max_depth : int
+      The maximum depth of the searches
+    chunk_size : int
+      The number of searches that are run together
+
+    Returns
+    -------
+    node_count : np.array of shape (max_depth+1, len(start_nodes))
+      node_count[depth][sample_number] is the number of nodes in the boundary
+      at the given depth
+    loop_edge_fraction : np.array of shape (max_depth+1, len(start_nodes))
+      loop_edge_fraction[depth][sample_number] is the loop edge fraction at
+      the given depth
+    """
+    start_nodes = np.asarray(start_nodes, dtype=np.int64)
+    net_size = adjacency.shape[0]
+    n_samples = len(start_nodes)
+    node_count = np.zeros((max_depth+1, n_samples), dtype=np.int64)
+    loop_edge_fraction = np.zeros((max_depth+1, n_samples))
+
+    for first in range(0, n_samples, chunk_size):
+        starts = start_nodes[first:first+chunk_size]
+        samples = slice(first, first+len(starts))
+        boundary = scipy.sparse.csr_matrix(
+            (np.ones(len(starts), dtype=np.int32),
+             (np.arange(len(starts)), starts)),
+            shape=(len(starts), net_size))
+        visited = boundary.copy()
+
+        for depth in range(max_depth+1):
+            n_boundary = boundary.getnnz(axis=1)
+            n_visited = visited.getnnz(axis=1)
+
+            # reached[s, j] is the number of edges from the boundary of
+            # search s to node j
+            reached = boundary.dot(adjacency)
+            edge_count = np.asarray(
+                reached.multiply(visited).sum(axis=1)).ravel()
+
+            fraction = np.zeros(len(starts))
+            has_loops = (n_visited > 1) & (edge_count > 0)
+            fraction[has_loops] = ((edge_count[has_loops] - n_boundary[has_loops])
+                                   / edge_count[has_loops].astype(float))
+
+            node_count[depth, samples] = n_boundary
+            loop_edge_fraction[depth, samples] = fraction
+
+            if depth == max_depth:
+                break
+            # the new boundary consists of the reached nodes not visited before
+            boundary = (reached - reached.multiply(visited)).tocsr()
+            boundary.eliminate_zeros()
+            boundary.data[:] = 1
+            visited = visited + boundary
+
+    return node_count, loop_edge_fraction
+
+
 def ER_breadth_first_search(avg_degree, net_size, number_of_samples,
                             max_depth=15, show_netsize=False):
     """Creates a figure of breadth first search in an ER network.
@@ -288,42 +829,19 @@ def ER_breadth_first_search(avg_degree, net_size, number_of_samples,
     -------
     fig : figure object
     """
-    net = create_er_network(net_size, avg_degree)
+    adjacency = create_er_csr(net_size, avg_degree)
 
     # We will count the number of nodes and the loop fraction for each depth and each
-    # starting node. That is, we need a 2-dimensional list to save these results.
-    # The element node_count[depth][sample_number] gives the number of nodes at the boundary
-    # of the BFS at the given depth for given sample number.
-    # The code below will create lists of length max_depth where each element is an empty list.
-    node_count = [[] for depth in range(max_depth+1)]
-    loop_edge_fraction = [[] for depth in range(max_depth+1)]
-
-    # Next we will run the BFS until max_depth for each randomly selected sample
-    for _sample_nr in range(number_of_samples):
-        # Choose random starting node:
-        start_node = random.randint(0, net_size-1)
-        # In the beginning we have only visited the start node:
-        visited_nodes = set([start_node])
-        # The start node is also the only boundary node, see expand_breadth_first_search:
-        boundary_nodes = set([start_node])
-
-        for depth in range(max_depth+1):
-
-            number_of_boundary_nodes = len(boundary_nodes)
-
-            fraction_of_loop_edges = calculate_loop_edge_fraction(net,
-                                                                  visited_nodes, boundary_nodes)
-
-            # Update the visited nodes and the boundary
-            expand_breadth_first_search(net, visited_nodes, boundary_nodes)
-
-            # Saving the results
-            node_count[depth].append(number_of_boundary_nodes)
-            loop_edge_fraction[depth].append(fraction_of_loop_edges)
+    # starting node. The element node_count[depth][sample_number] gives the number of
+    # nodes at the boundary of the BFS at the given depth for given sample number.
+    # All the searches are run together, see batched_breadth_first_search.
+    start_nodes = [random.randint(0, net_size-1) for _ in range(number_of_samples)]
+    node_count, loop_edge_fraction = batched_breadth_first_search(
+        adjacency, start_nodes, max_depth)
 
     # Averaging over the different starting nodes.
-    avg_node_count = list(map(np.mean, node_count))
-    avg_loop_edge_fraction = list(map(np.mean, loop_edge_fraction))
+    avg_node_count = node_count.mean(axis=1)
+    avg_loop_edge_fraction = loop_edge_fraction.mean(axis=1)
 
     # Calculating the theoretical values, assuming the network is a tree
     avg_node_count_theoretical = []
@@ -392,5 +910,18 @@ if __name__ == "__main__":
     fig.savefig('./assets/er_breadthfirst_2_100k.pdf')
 
     #Solution for d)-e):
-    ER_percolation(10**5, 2.5, 0.05)
+    fig = ER_percolation(10**5, 2.5, 0.05)
     fig.savefig('./assets/er_percolation.pdf')
+
+    fig = ER_percolation_sweep(10**5, 2.5, n_sequences=10)
+    fig.savefig('./assets/er_percolation_sweep.pdf')
+
+    # finite-size scaling around the percolation threshold
+    results = finite_size_scaling(np.logspace(3, 7, 9).astype(int), n_seeds=20)
+    k_c_err, one_over_nu_err = np.sqrt(np.diag(results['fit_cov']))[[0, 2]]
+    print(f"k_c = {results['k_c']:.4f} +- {k_c_err:.4f}, "
+          f"1/nu = {results['one_over_nu']:.3f} +- {one_over_nu_err:.3f}, "
+          f"gamma/nu = {results['gamma_over_nu']:.3f}, "
+          f"giant exponent = {results['giant_exponent']:.3f}")
+    fig = plot_finite_size_scaling(results)
+    fig.savefig('./assets/er_finite_size_scaling.pdf')
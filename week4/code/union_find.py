@@ -0,0 +1,79 @@
+"""
+Weighted union-find (disjoint set forest) on integer node indices 0..n-1.
+
+The forest is stored in two plain lists, parent and size, which are faster
+to index from pure Python than numpy arrays. Roots are found with path
+halving and sets are merged by size, so a sequence of m operations costs
+O(m alpha(n)).
+
+Usage:
+
+parent, size = make_sets(n)
+merged_size = union(parent, size, i, j)  # 0 if i and j were already joined
+"""
+
+
+def make_sets(n):
+    """
+    Creates n singleton sets.
+
+    Parameters
+    ----------
+    n : int
+      number of elements
+
+    Returns
+    -------
+    parent : list of ints
+      parent[i] is the parent of element i in the forest
+    size : list of ints
+      size[r] is the size of the set whose root is r
+    """
+    return list(range(n)), [1] * n
+
+
+def find_root(parent, i):
+    """
+    Returns the root of the set containing element i. The path to the root
+    is halved on the way.
+
+    Parameters
+    ----------
+    parent : list of ints
+    i : int
+
+    Returns
+    -------
+    root : int
+    """
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def union(parent, size, i, j):
+    """
+    Merges the sets containing elements i and j. The smaller set is attached
+    below the root of the larger one.
+
+    Parameters
+    ----------
+    parent : list of ints
+    size : list of ints
+    i, j : int
+
+    Returns
+    -------
+    merged_size : int
+      size of the merged set, or 0 if i and j were already in the same set
+    """
+    root_i = find_root(parent, i)
+    root_j = find_root(parent, j)
+    if root_i == root_j:
+        return 0
+    if size[root_i] < size[root_j]:
+        root_i, root_j = root_j, root_i
+    parent[root_j] = root_i
+    size[root_i] += size[root_j]
+    return size[root_i]
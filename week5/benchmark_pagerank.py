@@ -0,0 +1,447 @@
+# Benchmarks the PageRank implementations of pagerank.py on synthetic directed
+# networks of increasing size, fits the empirical scaling exponent of the
+# running time of each implementation and writes the results to a JSON file.
+#
+# Usage:
+#   python benchmark_pagerank.py --output results.json
+#   python benchmark_pagerank.py --baseline results.json
+#
+# With --baseline, the new timings are compared to a stored result file and the
+# script exits with status 1 if an implementation got slower than the
+# tolerance allows.
+#
+# The results also compare update_pagerank after small batches of link changes
+# to a full solve of the changed network (--update-batches, --update-size).
+from __future__ import print_function
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+import numpy as np
+import scipy
+import networkx as nx
+
+from pagerank import (pageRank, pagerank_poweriter, pagerank_sparse,
+                      pagerank_random_walkers, pagerank_multi_csr,
+                      pagerank_csr, network_to_csr, edgelist_to_blocks,
+                      pagerank_out_of_core, update_pagerank,
+                      personalized_pagerank, personalized_pagerank_push)
+
+# ====================== FUNCTIONS USED BY THE MAIN CODE ===================
+#
+# ====================== FOR THE MAIN CODE SCROLL TO THE BOTTOM ============
+
+# name: (function of a network, or of its preparation in PREPARATIONS,
+#        largest network size it is run on)
+# The pure Python implementations are only run on the smaller networks.
+IMPLEMENTATIONS = {
+    'random_walker': (lambda net: pageRank(net, 0.85, 10 * len(net)), 10**4),
+    'power_iteration': (lambda net: pagerank_poweriter(net, 0.85, 10), 10**4),
+    'networkx': (lambda net: nx.pagerank(net), 10**5),
+    'sparse_power_iteration': (lambda net: pagerank_sparse(net), 10**7),
+    'multi_damping': (
+        lambda net: pagerank_multi_csr(network_to_csr(net)[0],
+                                       [0.5, 0.85, 0.95]), 10**7),
+    'random_walkers': (
+        lambda net: pagerank_random_walkers(net, 0.85, 10 * len(net),
+                                            n_walkers=10**4), 10**7),
+    'out_of_core': (lambda prefix: pagerank_out_of_core(prefix), 10**7),
+    'incremental_update': (lambda state: apply_next_batch(state), 10**7),
+    'personalized_push': (
+        lambda state: [personalized_pagerank_push(
+            state['adjacency'], seed, eps=PUSH_EPS,
+            out_degrees=state['out_degrees']) for seed in state['seeds']],
+        10**7),
+    'personalized_pagerank': (
+        lambda state: personalized_pagerank(state['adjacency'],
+                                            state['seeds'], eps=PUSH_EPS),
+        10**7),
+}
+
+# number of inserted and of deleted links of the incremental_update case
+UPDATE_BATCH_SIZE = 10
+# number of seed nodes and push threshold of the personalized PageRank cases
+N_PUSH_SEEDS = 10
+PUSH_EPS = 1e-4
+
+def write_edge_blocks(network, directory):
+    """
+    Writes the network as edge blocks for pagerank_out_of_core.
+
+    Parameters
+    ----------
+    network : networkx.DiGraph with the nodes 0, ..., n-1
+    directory : directory where the files are written
+
+    Returns
+    -------
+    prefix : path prefix of the edge blocks
+    """
+    path = os.path.join(directory, 'network.edg')
+    nx.write_edgelist(network, path, data=False)
+    prefix = os.path.join(directory, 'network')
+    edgelist_to_blocks(path, prefix, relabel=False)
+    return prefix
+
+def random_link_batch(adjacency, batch_size, rng):
+    """
+    Draws a batch of batch_size new random links and batch_size distinct
+    existing links to delete.
+
+    Parameters
+    ----------
+    adjacency : scipy.sparse.csr_matrix without explicit zeros
+    batch_size : int
+    rng : np.random.RandomState
+
+    Returns
+    -------
+    insertions, deletions : np.arrays of (i, j) index pairs
+    """
+    n_nodes = adjacency.shape[0]
+    insertions = rng.randint(0, n_nodes, (batch_size, 2))
+    links = rng.choice(adjacency.nnz, batch_size, replace=False)
+    sources = np.repeat(np.arange(n_nodes), np.diff(adjacency.indptr))
+    deletions = np.column_stack((sources[links], adjacency.indices[links]))
+    return insertions, deletions
+
+def prepare_update(network, directory):
+    """
+    Computes the PageRank of the network and draws a fixed batch of
+    UPDATE_BATCH_SIZE link insertions and deletions for update_pagerank.
+
+    update_pagerank changes the matrix in place, so the timed runs apply the
+    batch and its inverse (the insertions and deletions swapped) in turn,
+    and every run starts from the network the previous one left.
+
+    Parameters
+    ----------
+    network : networkx.DiGraph with the nodes 0, ..., n-1
+    directory : not used
+
+    Returns
+    -------
+    state : dict with the 'adjacency' matrix, its 'out_degrees', the
+            PageRank vector 'x', the two 'batches' and the index of the
+            'next' one
+    """
+    adjacency, _ = network_to_csr(network, nodes=range(len(network)))
+    insertions, deletions = random_link_batch(
+        adjacency, UPDATE_BATCH_SIZE, np.random.RandomState(0))
+    return {'adjacency': adjacency,
+            'out_degrees': np.asarray(adjacency.sum(axis=1)).ravel(),
+            'x': pagerank_csr(adjacency)[0],
+            'batches': [(insertions, deletions), (deletions, insertions)],
+            'next': 0}
+
+def apply_next_batch(state):
+    """
+    Updates the PageRank of the prepared state with its next batch, see
+    prepare_update.
+    """
+    insertions, deletions = state['batches'][state['next']]
+    state['adjacency'], state['x'], info = update_pagerank(
+        state['adjacency'], state['x'], insertions, deletions,
+        out_degrees=state['out_degrees'])
+    state['next'] = 1 - state['next']
+    return info
+
+def prepare_push(network, directory):
+    """
+    Converts the network for personalized PageRank and picks a fixed set of
+    N_PUSH_SEEDS seed nodes.
+
+    Parameters
+    ----------
+    network : networkx.DiGraph with the nodes 0, ..., n-1
+    directory : not used
+
+    Returns
+    -------
+    state : dict with the 'adjacency' matrix, its 'out_degrees' and the
+            'seeds'
+    """
+    adjacency, _ = network_to_csr(network, nodes=range(len(network)))
+    seeds = np.random.RandomState(0).choice(
+        len(network), min(N_PUSH_SEEDS, len(network)), replace=False)
+    return {'adjacency': adjacency,
+            'out_degrees': np.asarray(adjacency.sum(axis=1)).ravel(),
+            'seeds': seeds.tolist()}
+
+# name: function that turns a network into the input of the implementation,
+# run in a temporary directory and not included in the timing
+PREPARATIONS = {
+    'out_of_core': write_edge_blocks,
+    'incremental_update': prepare_update,
+    'personalized_push': prepare_push,
+    'personalized_pagerank': prepare_push,
+}
+
+def generate_directed_network(n_nodes, avg_out_degree=5, seed=None):
+    """
+    Creates a directed random network where each node has avg_out_degree
+    links to uniformly random other nodes (fewer if some coincide). Every node
+    has out-links, so the random walker of pageRank never gets stuck.
+
+    Parameters
+    ----------
+    n_nodes : int
+    avg_out_degree : int
+    seed : int, optional
+
+    Returns
+    -------
+    network : networkx.DiGraph
+    """
+    rng = np.random.RandomState(seed)
+    sources = np.repeat(np.arange(n_nodes), avg_out_degree)
+    targets = rng.randint(0, n_nodes, len(sources))
+    self_loops = sources == targets
+    targets[self_loops] = (targets[self_loops] + 1) % n_nodes
+    network = nx.DiGraph()
+    network.add_nodes_from(range(n_nodes))
+    network.add_edges_from(zip(sources.tolist(), targets.tolist()))
+    return network
+
+def time_implementation(func, network, n_repeats):
+    """
+    Measures the running time and the peak memory use of func(network).
+
+    The time is measured n_repeats times without memory tracing, and the
+    peak memory in one extra run with tracemalloc.
+
+    Parameters
+    ----------
+    func : function of a network (or of its prepared input)
+    network : networkx graph, or the prepared input of func
+    n_repeats : int
+
+    Returns
+    -------
+    times : list of floats, running times in seconds
+    peak_memory : int, peak memory allocated during the call in bytes
+    """
+    times = timeit.repeat(lambda: func(network), number=1, repeat=n_repeats)
+    tracemalloc.start()
+    func(network)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return times, peak_memory
+
+def fit_scaling_exponent(n_nodes, times):
+    """
+    Fits time ~ n_nodes**exponent by least squares on a log-log scale.
+
+    Parameters
+    ----------
+    n_nodes : list of ints
+    times : list of floats
+
+    Returns
+    -------
+    exponent : float, or None if there are fewer than two sizes
+    prefactor : float, or None
+    """
+    if len(n_nodes) < 2:
+        return None, None
+    exponent, log_prefactor = np.polyfit(np.log(n_nodes), np.log(times), 1)
+    return float(exponent), float(np.exp(log_prefactor))
+
+def run_benchmark(sizes, implementations=None, n_repeats=3, seed=42):
+    """
+    Times each implementation on a directed network of each size.
+
+    Parameters
+    ----------
+    sizes : list of ints, the size ladder
+    implementations : list of names in IMPLEMENTATIONS, defaults to all
+    n_repeats : number of timed runs per implementation and size
+    seed : seed of the network generator
+
+    Returns
+    -------
+    results : dict, see the main code for the layout
+    """
+    if implementations is None:
+        implementations = list(IMPLEMENTATIONS)
+    results = {name: {'n_nodes': [], 'time_min': [], 'time_median': [],
+                      'peak_memory': []} for name in implementations}
+
+    for n_nodes in sizes:
+        network = generate_directed_network(n_nodes, seed=seed)
+        for name in implementations:
+            func, max_nodes = IMPLEMENTATIONS[name]
+            if n_nodes > max_nodes:
+                continue
+            if name in PREPARATIONS:
+                with tempfile.TemporaryDirectory() as directory:
+                    prepared = PREPARATIONS[name](network, directory)
+                    times, peak_memory = time_implementation(func, prepared,
+                                                             n_repeats)
+            else:
+                times, peak_memory = time_implementation(func, network,
+                                                         n_repeats)
+            print(f'{name:>24} n={n_nodes:>9}: {min(times):9.4f} s, '
+                  f'{peak_memory / 2**20:9.1f} MiB', file=sys.stderr)
+            results[name]['n_nodes'].append(n_nodes)
+            results[name]['time_min'].append(min(times))
+            results[name]['time_median'].append(float(np.median(times)))
+            results[name]['peak_memory'].append(peak_memory)
+
+    for name, result in results.items():
+        result['exponent'], result['prefactor'] = fit_scaling_exponent(
+            result['n_nodes'], result['time_min'])
+
+    return {'environment': {'python': platform.python_version(),
+                            'numpy': np.__version__,
+                            'scipy': scipy.__version__,
+                            'networkx': nx.__version__,
+                            'machine': platform.machine()},
+            'n_repeats': n_repeats,
+            'implementations': results}
+
+def compare_to_baseline(results, baseline, tolerance=1.5):
+    """
+    Finds the implementations and sizes whose running time grew by more than
+    the tolerance factor compared to a stored baseline.
+
+    Parameters
+    ----------
+    results : dict, output of run_benchmark
+    baseline : dict, output of run_benchmark stored earlier
+    tolerance : float
+
+    Returns
+    -------
+    regressions : list of (name, n_nodes, time ratio) tuples
+    """
+    regressions = []
+    for name, result in results['implementations'].items():
+        if name not in baseline['implementations']:
+            continue
+        old = baseline['implementations'][name]
+        old_times = dict(zip(old['n_nodes'], old['time_min']))
+        for n_nodes, time in zip(result['n_nodes'], result['time_min']):
+            if n_nodes in old_times:
+                ratio = time / old_times[n_nodes]
+                if ratio > tolerance:
+                    regressions.append((name, n_nodes, ratio))
+    return regressions
+
+def benchmark_incremental_update(n_nodes, batch_sizes, n_repeats=3, d=0.85,
+                                 tol=1e-8, seed=42):
+    """
+    Compares update_pagerank after a batch of link changes to solving the
+    changed network from scratch with pagerank_csr, for the same L1 error
+    bound tol.
+
+    Parameters
+    ----------
+    n_nodes : size of the network, see generate_directed_network
+    batch_sizes : list of ints, numbers of inserted and of deleted links
+    n_repeats : number of timed runs per batch size
+    d : damping factor
+    tol : L1 error bound of both methods
+    seed : seed of the network generator and of the batches
+
+    Returns
+    -------
+    results : dict of lists with one entry per batch size: 'batch_size',
+              'update_time', 'full_time' (minimum over the runs), 'speedup',
+              and the L1 errors 'update_error' and 'full_error' compared to
+              a solution converged to 1e-14
+    """
+    rng = np.random.RandomState(seed)
+    adjacency, _ = network_to_csr(generate_directed_network(n_nodes,
+                                                            seed=seed))
+    x = pagerank_csr(adjacency, d, tol=1e-14, max_iter=1000)[0]
+    out_degrees = np.asarray(adjacency.sum(axis=1)).ravel()
+    results = {'n_nodes': n_nodes, 'tol': tol, 'batch_size': [],
+               'update_time': [], 'full_time': [], 'speedup': [],
+               'update_error': [], 'full_error': []}
+    for batch_size in batch_sizes:
+        insertions, deletions = random_link_batch(adjacency, batch_size, rng)
+        update_times = []
+        for _ in range(n_repeats):
+            # the update changes the matrix in place, so each run gets a copy
+            new, degrees = adjacency.copy(), out_degrees.copy()
+            start = timeit.default_timer()
+            new, x_update, _ = update_pagerank(new, x, insertions, deletions,
+                                               d, tol, out_degrees=degrees)
+            update_times.append(timeit.default_timer() - start)
+        # pagerank_csr bounds the error by d*residual/(1-d)
+        full_times = timeit.repeat(
+            lambda: pagerank_csr(new, d, tol=(1 - d) * tol / d,
+                                 max_iter=1000), number=1, repeat=n_repeats)
+        x_full = pagerank_csr(new, d, tol=(1 - d) * tol / d, max_iter=1000)[0]
+        x_exact = pagerank_csr(new, d, tol=1e-14, max_iter=1000)[0]
+        results['batch_size'].append(batch_size)
+        results['update_time'].append(min(update_times))
+        results['full_time'].append(min(full_times))
+        results['speedup'].append(min(full_times) / min(update_times))
+        results['update_error'].append(float(np.abs(x_update - x_exact).sum()))
+        results['full_error'].append(float(np.abs(x_full - x_exact).sum()))
+        print(f'{"incremental_update":>24} batch={batch_size:>6}: '
+              f'{min(update_times):9.4f} s, full solve '
+              f'{min(full_times):9.4f} s', file=sys.stderr)
+    return results
+
+# =========================== MAIN CODE BELOW ==============================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark the PageRank implementations of pagerank.py')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10**3, 3 * 10**3, 10**4, 3 * 10**4, 10**5,
+                                 3 * 10**5, 10**6])
+    parser.add_argument('--implementations', nargs='+',
+                        choices=list(IMPLEMENTATIONS), default=None)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', default='pagerank_benchmark.json')
+    parser.add_argument('--baseline', default=None,
+                        help='result file to compare the timings against')
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help='allowed slowdown factor compared to the baseline')
+    parser.add_argument('--update-size', type=int, default=2 * 10**5,
+                        help='network size of the update vs full solve '
+                        'comparison')
+    parser.add_argument('--update-batches', type=int, nargs='*',
+                        default=[1, 10, 100, 1000],
+                        help='numbers of inserted and deleted links of the '
+                        'update vs full solve comparison (none to skip it)')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sizes, args.implementations, args.repeats)
+    if args.update_batches:
+        results['incremental_update'] = benchmark_incremental_update(
+            args.update_size, args.update_batches, args.repeats)
+        for batch_size, speedup in zip(
+                results['incremental_update']['batch_size'],
+                results['incremental_update']['speedup']):
+            print(f'update of {batch_size} + {batch_size} links: '
+                  f'{speedup:.1f}x faster than a full solve')
+
+    # Extrapolation to the 26*10**6 node Wikipedia network
+    for name, result in results['implementations'].items():
+        if result['exponent'] is not None:
+            hours = result['prefactor'] * (26 * 10**6)**result['exponent'] / 3600
+            print(f'{name}: time ~ n^{result["exponent"]:.2f}, '
+                  f'26*10**6 nodes would take about {hours:.2f} h')
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print('Results saved to ' + args.output)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for name, n_nodes, ratio in regressions:
+            print(f'REGRESSION {name} n={n_nodes}: {ratio:.2f}x slower than baseline')
+        if regressions:
+            sys.exit(1)
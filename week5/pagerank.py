@@ -11,13 +11,23 @@
 # write your own code. When you successfully modified the code in that part,
 # remove the `raise` command.
 from __future__ import print_function
+from collections import deque
+from multiprocessing import Pool
+import heapq
+import itertools
+import json
+import os
+import tempfile
 import timeit
 
 import numpy as np
+import scipy.sparse as sp
 import matplotlib as mpl
 import matplotlib.pylab as plt
 import networkx as nx
 
+import network_drawing
+
 # ====================== FUNCTIONS USED BY THE MAIN CODE ===================
 #
 # ====================== FOR THE MAIN CODE SCROLL TO THE BOTTOM ============
@@ -92,7 +102,7 @@ def pageRank(network, d, n_steps):
     # 5) Normalize PageRank by n_steps
     return pageRank
 
-def pagerank_poweriter(g, d, iterations):
+def pagerank_poweriter(g, d, iterations, output=False):
     """
     Uses the power iteration method to calculate PageRank value for each node
     in the network.
@@ -102,12 +112,13 @@ def pagerank_poweriter(g, d, iterations):
     g : a networkx graph object
     d : damping factor of the simulation
     n_iterations : number of iterations to perform
+    output : if True, prints sanity checks after each iteration
 
     Returns
     --------
     pr_old : dict where keys are nodes and values are PageRank values
     """
-    nodes = list(g.node)
+    nodes = list(g.nodes())
     n_nodes = len(nodes)
 
     # 1) Create a PageRank dictionary and initialize the PageRank of each node
@@ -141,11 +152,738 @@ def pagerank_poweriter(g, d, iterations):
             print(f'{sum([abs(pageRankDic[i]-pr_old[i]) for i in g])}')
     return pageRankDic
 
+def network_to_csr(network, nodes=None):
+    """
+    Returns the adjacency matrix of the network as a sparse CSR matrix, where
+    element (i, j) is the number of links from node i to node j. Undirected
+    links are counted in both directions.
+
+    Parameters
+    -----------
+    network : a networkx graph object
+    nodes : list of nodes giving the order of the rows and columns, defaults
+            to the order of network.nodes()
+
+    Returns
+    --------
+    adjacency : scipy.sparse.csr_matrix of shape (n_nodes, n_nodes)
+    nodes : list of nodes in the order of the rows
+    """
+    if nodes is None:
+        nodes = list(network.nodes())
+    node_index = {node: i for i, node in enumerate(nodes)}
+    edges = np.array([(node_index[u], node_index[v])
+                      for u, v in network.edges()], dtype=np.int64).reshape(-1, 2)
+    sources, targets = edges[:, 0], edges[:, 1]
+    if not network.is_directed():
+        sources, targets = (np.concatenate((sources, targets)),
+                            np.concatenate((targets, sources)))
+    adjacency = sp.csr_matrix(
+        (np.ones(len(sources)), (sources, targets)),
+        shape=(len(nodes), len(nodes)))
+    return adjacency, nodes
+
+def _transition_arrays(adjacency, dtype):
+    """
+    Returns the arrays needed for a power iteration step: the transposed
+    adjacency matrix, the inverse out-degrees (0 for dangling nodes) and a
+    boolean mask of the dangling nodes.
+    """
+    n_nodes = adjacency.shape[0]
+    transposed = sp.csr_matrix(adjacency.T, dtype=dtype)
+    out_degree = np.asarray(adjacency.sum(axis=1), dtype=dtype).ravel()
+    dangling = out_degree == 0
+    inv_out_degree = np.zeros(n_nodes, dtype=dtype)
+    inv_out_degree[~dangling] = 1 / out_degree[~dangling]
+    return transposed, inv_out_degree, dangling
+
+def pagerank_csr(adjacency, d=0.85, tol=1e-10, max_iter=100,
+                 dtype=np.float64, x0=None):
+    """
+    Calculates PageRank with power iteration on a sparse adjacency matrix.
+
+    In each iteration x <- d*P^T x + (d*(dangling mass) + 1 - d)/n, where P
+    is the row-normalised adjacency matrix: the PageRank of nodes without
+    out-links (dangling nodes) is spread uniformly over all nodes, so that
+    x stays normalised to one. The iteration stops when the L1 norm of the
+    change of x is below tol, or after max_iter iterations.
+
+    Parameters
+    -----------
+    adjacency : scipy.sparse matrix, element (i, j) is the number (or weight)
+                of links from node i to node j, see network_to_csr
+    d : damping factor
+    tol : tolerance of the L1 change between two iterations. With
+          dtype=np.float32 values below about 1e-6 can not be reached.
+    max_iter : maximum number of iterations
+    dtype : floating point type used for the iteration, np.float64 or
+            np.float32 (half the memory)
+    x0 : initial PageRank vector (warm start), defaults to the uniform
+         vector 1/n. It is normalised to sum to one.
+
+    Returns
+    --------
+    x : np.array of PageRank values in the order of the rows of adjacency
+    n_iter : number of iterations performed
+    residuals : list of the L1 changes after each iteration; if
+                residuals[-1] >= tol the iteration did not converge
+    """
+    n_nodes = adjacency.shape[0]
+    transposed, inv_out_degree, dangling = _transition_arrays(adjacency, dtype)
+
+    if x0 is None:
+        x = np.full(n_nodes, 1.0 / n_nodes, dtype=dtype)
+    else:
+        x = np.asarray(x0, dtype=dtype)
+        x = x / x.sum()
+
+    residuals = []
+    for _ in range(max_iter):
+        x_new = transposed.dot(x * inv_out_degree)
+        x_new *= d
+        x_new += (d * x[dangling].sum() + 1 - d) / n_nodes
+        residuals.append(float(np.abs(x_new - x).sum()))
+        x = x_new
+        if residuals[-1] < tol:
+            break
+    return x, len(residuals), residuals
+
+def pagerank_multi_csr(adjacency, ds, personalization=None, tol=1e-10,
+                       max_iter=100, dtype=np.float64):
+    """
+    Calculates PageRank for several damping factors and/or personalization
+    vectors at once. The K PageRank vectors are iterated together as the
+    columns of an n x K matrix, so the adjacency matrix is read once per
+    iteration for all of them.
+
+    Column k is iterated as x <- d_k*(P^T x + (dangling mass)*v_k) +
+    (1-d_k)*v_k, where v_k is the personalization vector of the column, i.e.
+    both teleportation and the PageRank of dangling nodes go to v_k. With
+    uniform v_k this is the same as pagerank_csr.
+
+    Parameters
+    -----------
+    adjacency : scipy.sparse matrix, see pagerank_csr
+    ds : damping factor, or a list of K damping factors
+    personalization : None for uniform teleportation, an array of length n,
+                      or an n x K array with one personalization vector per
+                      column. The vectors are normalised to sum to one.
+    tol : tolerance of the L1 change between two iterations, required for
+          every column
+    max_iter : maximum number of iterations
+    dtype : floating point type used for the iteration
+
+    Returns
+    --------
+    x : n x K array of PageRank values, column k for ds[k] and the k:th
+        personalization vector
+    n_iter : number of iterations performed
+    residuals : list of arrays of the L1 changes of each column after each
+                iteration
+    """
+    n_nodes = adjacency.shape[0]
+    transposed, inv_out_degree, dangling = _transition_arrays(adjacency, dtype)
+
+    ds = np.atleast_1d(np.asarray(ds, dtype=dtype))
+    if personalization is None:
+        v = np.full((n_nodes, 1), 1.0 / n_nodes, dtype=dtype)
+    else:
+        v = np.asarray(personalization, dtype=dtype).reshape(n_nodes, -1)
+        v = v / v.sum(axis=0)
+    n_columns = max(len(ds), v.shape[1])
+    ds = np.broadcast_to(ds, (n_columns,))
+    v = np.ascontiguousarray(np.broadcast_to(v, (n_nodes, n_columns)))
+
+    x = v.copy()
+    residuals = []
+    for _ in range(max_iter):
+        x_new = transposed.dot(x * inv_out_degree[:, None])
+        x_new += x[dangling].sum(axis=0) * v
+        x_new *= ds
+        x_new += (1 - ds) * v
+        residuals.append(np.abs(x_new - x).sum(axis=0))
+        x = x_new
+        if np.all(residuals[-1] < tol):
+            break
+    return x, len(residuals), residuals
+
+def _entry_positions(adjacency, rows, cols):
+    """
+    Returns the positions of the entries (rows[k], cols[k]) in the data and
+    indices arrays of a CSR matrix with sorted indices, and whether each
+    entry is stored. For missing entries the position is where it would be
+    inserted to keep the indices sorted.
+    """
+    indptr, indices = adjacency.indptr, adjacency.indices
+    positions = np.empty(len(rows), dtype=np.int64)
+    found = np.zeros(len(rows), dtype=bool)
+    for k, (i, j) in enumerate(zip(rows.tolist(), cols.tolist())):
+        start, end = indptr[i], indptr[i + 1]
+        position = start + np.searchsorted(indices[start:end], j)
+        positions[k] = position
+        found[k] = position < end and indices[position] == j
+    return positions, found
+
+def update_adjacency(adjacency, insertions=(), deletions=(), out_degrees=None):
+    """
+    Adds and removes links of a CSR adjacency matrix in place, touching only
+    the rows of the changed links.
+
+    Links that are already stored (also as explicit zeros left by earlier
+    deletions) are updated in the data array. New entries are inserted into
+    the data and indices arrays at their sorted positions with one np.insert,
+    i.e. a single copy of the arrays instead of rebuilding the matrix.
+    Deleted links are kept as explicit zeros, so that the structure does not
+    move and a link added back later is again updated in place.
+
+    Parameters
+    -----------
+    adjacency : scipy.sparse.csr_matrix, see network_to_csr; it is modified
+    insertions : list of (i, j) row/column index pairs of links to add
+    deletions : list of (i, j) row/column index pairs of links to remove
+    out_degrees : np.array of the row sums of adjacency, updated in place if
+                  given
+
+    Returns
+    --------
+    adjacency : the same matrix, for convenience
+    """
+    adjacency.sort_indices()
+    n_nodes = adjacency.shape[0]
+    insertions = np.asarray(insertions, dtype=np.int64).reshape(-1, 2)
+    deletions = np.asarray(deletions, dtype=np.int64).reshape(-1, 2)
+    # net change of each link; a link may appear several times in a batch
+    pairs, inverse = np.unique(np.concatenate((insertions, deletions)),
+                               axis=0, return_inverse=True)
+    change = np.bincount(inverse.ravel(),
+                         weights=np.r_[np.ones(len(insertions)),
+                                       -np.ones(len(deletions))],
+                         minlength=len(pairs))
+    pairs, change = pairs[change != 0], change[change != 0]
+    rows, cols = pairs[:, 0], pairs[:, 1]
+
+    positions, found = _entry_positions(adjacency, rows, cols)
+    old_values = np.zeros(len(pairs))
+    old_values[found] = adjacency.data[positions[found]]
+    if np.any(old_values + change < 0):
+        raise ValueError("trying to delete a link that does not exist")
+
+    adjacency.data[positions[found]] += change[found]
+    if not np.all(found):
+        # the new entries are sorted by (row, column) as np.unique sorts
+        # the pairs, so inserting them at their positions keeps the order
+        new = ~found
+        adjacency.data = np.insert(adjacency.data, positions[new], change[new])
+        adjacency.indices = np.insert(adjacency.indices, positions[new],
+                                      cols[new].astype(adjacency.indices.dtype))
+        adjacency.indptr[1:] += np.cumsum(
+            np.bincount(rows[new], minlength=n_nodes)).astype(
+                adjacency.indptr.dtype)
+    if out_degrees is not None:
+        np.add.at(out_degrees, rows, change)
+    return adjacency
+
+def update_pagerank(adjacency, x, insertions=(), deletions=(), d=0.85,
+                    tol=1e-8, out_degrees=None):
+    """
+    Updates a PageRank vector after a batch of link insertions and deletions
+    without recomputing it from scratch.
+
+    PageRank solves x = (1-d)/n + d*M x, where M is the transition matrix of
+    pagerank_csr. For the old vector and the new matrix the residual
+    r = (1-d)/n + d*M x - x is nonzero only at the out-neighbours of the
+    nodes whose links changed (plus a uniform part if a node became or
+    stopped being dangling), and its L1 norm is proportional to the size of
+    the change. The residual is pushed in rounds (x_u += r_u, and d*r_u is
+    spread over the out-neighbours of u), which shrinks its L1 norm at
+    least by the factor d per round, until ||r||_1 / (1-d) <= tol. So the
+    number of rounds is at most log(||r||_1 / ((1-d)*tol)) / log(1/d) for
+    the initial residual. While the residual stays local, a round only
+    visits the links of the nodes that hold it; once a round would visit
+    more than an eighth of the links, all nodes are pushed at once with one
+    sparse product, which costs the same as a power iteration step.
+
+    The result x' satisfies ||x' - x*||_1 <= tol, where x* is the exact
+    PageRank of the new network, provided that the given x was exact for
+    the old network; otherwise the error of x is added to this bound.
+
+    Parameters
+    -----------
+    adjacency : scipy.sparse.csr_matrix of the old network, see
+                network_to_csr; it is updated in place with
+                update_adjacency (other formats are converted to a new
+                matrix first)
+    x : PageRank vector of the old network
+    insertions : list of (i, j) node index pairs of links to add
+    deletions : list of (i, j) node index pairs of links to remove
+    d : damping factor
+    tol : bound of the L1 error of the result
+    out_degrees : np.array of the row sums of adjacency, updated in place;
+                  computing them costs O(M), so keep them between updates
+                  (computed if not given)
+
+    Returns
+    --------
+    new_adjacency : scipy.sparse.csr_matrix of the new network
+    x : np.array of PageRank values of the new network
+    info : dict with the number of node 'pushes', the number of push
+           'rounds', how many of them were 'global_rounds' over all nodes,
+           and the 'error_bound' of the result
+    """
+    if not (sp.isspmatrix_csr(adjacency) and adjacency.dtype == np.float64):
+        adjacency = sp.csr_matrix(adjacency, dtype=np.float64)
+    if out_degrees is None:
+        out_degrees = np.asarray(adjacency.sum(axis=1)).ravel()
+    n_nodes = adjacency.shape[0]
+    x = np.array(x, dtype=np.float64)
+
+    # residual of x in the new network: r at individual nodes and a uniform
+    # part of uniform_r at every node, from the rows before and after the
+    # change
+    changed = np.unique(np.concatenate((
+        np.asarray(insertions, dtype=np.int64).reshape(-1, 2)[:, 0],
+        np.asarray(deletions, dtype=np.int64).reshape(-1, 2)[:, 0])))
+    old_rows = adjacency[changed]
+    update_adjacency(adjacency, insertions, deletions, out_degrees)
+    new_rows = adjacency[changed]
+    r = np.zeros(n_nodes)
+    uniform_r = 0.0
+    for rows, sign in ((old_rows, -1), (new_rows, 1)):
+        out_degree = np.asarray(rows.sum(axis=1)).ravel()
+        is_dangling = out_degree == 0
+        uniform_r += sign * d * x[changed[is_dangling]].sum() / n_nodes
+        scale = np.zeros(len(changed))
+        scale[~is_dangling] = sign * d * x[changed[~is_dangling]] / out_degree[~is_dangling]
+        np.add.at(r, rows.indices, rows.data * np.repeat(scale, np.diff(rows.indptr)))
+
+    dangling_out = out_degrees == 0
+    inv_out_degrees = None
+    link_counts = np.diff(adjacency.indptr)
+    # residuals below the threshold are not pushed in local rounds; all of
+    # them together stay below a quarter of the allowed residual
+    threshold = (1 - d) * tol / (4.0 * n_nodes)
+    # nodes that may hold a residual, kept without sorting: is_touched marks
+    # them and first_seen removes repeated indices in linear time
+    is_touched = np.zeros(n_nodes, dtype=bool)
+    first_seen = np.empty(n_nodes, dtype=np.int64)
+    touched = np.zeros(0, dtype=np.int64)
+
+    def touch(indices):
+        new = indices[~is_touched[indices]]
+        order = np.arange(len(new))
+        first_seen[new] = order
+        new = new[first_seen[new] == order]
+        is_touched[new] = True
+        return np.concatenate((touched, new))
+
+    touched = touch(np.concatenate((old_rows.indices, new_rows.indices)))
+    is_global = False
+
+    def error_bound():
+        residual = np.abs(r).sum() if is_global else np.abs(r[touched]).sum()
+        return float(residual + n_nodes * abs(uniform_r)) / (1 - d)
+
+    bound = error_bound()
+    max_rounds = 1
+    if bound > tol:
+        max_rounds += int(np.ceil(np.log(4 * bound / tol) / np.log(1 / d)))
+    n_pushes = n_rounds = n_global = 0
+    while bound > tol and n_rounds < max_rounds:
+        if not is_global:
+            active = touched[np.abs(r[touched]) > threshold]
+            is_global = (link_counts[active].sum() > adjacency.nnz // 8
+                         or n_nodes * abs(uniform_r) / (1 - d) > tol / 2)
+        if is_global:
+            # push all nodes: x += r, r <- d*M r
+            if inv_out_degrees is None:
+                inv_out_degrees = np.zeros(n_nodes)
+                inv_out_degrees[~dangling_out] = 1 / out_degrees[~dangling_out]
+            r += uniform_r
+            x += r
+            uniform_r = d * r[dangling_out].sum() / n_nodes
+            r = d * adjacency.T.dot(r * inv_out_degrees)
+            n_pushes += n_nodes
+            n_global += 1
+        else:
+            r_active = r[active]
+            x[active] += r_active
+            r[active] = 0
+            n_pushes += len(active)
+            is_dangling = dangling_out[active]
+            uniform_r += d * r_active[is_dangling].sum() / n_nodes
+            rows = adjacency[active]
+            spread = np.zeros(len(active))
+            spread[~is_dangling] = (d * r_active[~is_dangling]
+                                    / out_degrees[active][~is_dangling])
+            np.add.at(r, rows.indices,
+                      rows.data * np.repeat(spread, np.diff(rows.indptr)))
+            touched = touch(rows.indices)
+        n_rounds += 1
+        bound = error_bound()
+
+    return adjacency, x, {'pushes': n_pushes, 'rounds': n_rounds,
+                          'global_rounds': n_global, 'error_bound': bound}
+
+def personalized_pagerank_push(adjacency, seed, d=0.85, eps=1e-6,
+                               transposed=None, direction='forward',
+                               out_degrees=None):
+    """
+    Approximates personalized PageRank with local residual pushes, touching
+    only the neighbourhood of the seed node.
+
+    direction='forward' estimates the PageRank vector of a walker that
+    teleports back to seed (the pages most related to seed). A node u is
+    pushed while its residual is at least eps times its out-degree: (1-d)
+    times the residual goes to the estimate and d times it is spread over
+    the out-neighbours of u, or back to seed if u has no out-links.
+
+    direction='backward' estimates, for every node s, the PageRank of seed
+    in the vector personalized to s (the pages that lead to seed), with an
+    additive error below eps. The residual is pushed to the in-neighbours.
+    Walks that reach a node without out-links end there.
+
+    Parameters
+    -----------
+    adjacency : scipy.sparse.csr_matrix, see network_to_csr
+    seed : row index of the seed node
+    d : damping factor
+    eps : push threshold; the work is O(1/((1-d)*eps)) for both directions
+    transposed : CSR matrix of adjacency.T, needed for direction='backward'
+                 (computed if not given)
+    direction : 'forward' or 'backward'
+    out_degrees : np.array of the (weighted) out-degrees, the row sums of
+                  adjacency; computing them costs O(M), so pass them in when
+                  running many seeds (computed if not given)
+
+    Returns
+    --------
+    estimates : dict of node index -> estimated value, for the nodes reached
+    """
+    if out_degrees is None:
+        out_degrees = np.asarray(adjacency.sum(axis=1)).ravel()
+    if direction == 'forward':
+        matrix = adjacency
+    elif direction == 'backward':
+        matrix = transposed if transposed is not None else sp.csr_matrix(adjacency.T)
+    else:
+        raise ValueError("direction must be 'forward' or 'backward'")
+    indptr, indices, data = matrix.indptr, matrix.indices, matrix.data
+
+    def threshold(u):
+        if direction == 'forward':
+            return eps * max(out_degrees[u], 1)
+        return eps
+
+    estimates = {}
+    residuals = {seed: 1.0}
+    queue = deque([seed])
+    queued = {seed}
+    while queue:
+        u = queue.popleft()
+        queued.discard(u)
+        r_u = residuals.pop(u)
+        estimates[u] = estimates.get(u, 0.0) + (1 - d) * r_u
+
+        start, end = indptr[u], indptr[u+1]
+        if direction == 'forward':
+            if start == end:
+                targets, shares = [seed], [d * r_u]
+            else:
+                targets = indices[start:end].tolist()
+                shares = (d * r_u / out_degrees[u] * data[start:end]).tolist()
+        else:
+            targets = indices[start:end].tolist()
+            shares = (d * r_u * data[start:end] / out_degrees[targets]).tolist()
+
+        for w, share in zip(targets, shares):
+            r_w = residuals.get(w, 0.0) + share
+            residuals[w] = r_w
+            if r_w >= threshold(w) and w not in queued:
+                queue.append(w)
+                queued.add(w)
+    return estimates
+
+_push_worker_state = {}
+
+def _init_push_worker(adjacency, transposed, out_degrees, d, eps, top_k,
+                      direction):
+    """
+    Stores the arguments shared by all seeds in the worker process, so that
+    the network is sent to each worker only once.
+    """
+    _push_worker_state.update(adjacency=adjacency, transposed=transposed,
+                              out_degrees=out_degrees, d=d, eps=eps,
+                              top_k=top_k, direction=direction)
+
+def _push_worker(seed):
+    """
+    Runs personalized_pagerank_push for one seed in a worker process and
+    returns its top-k results.
+    """
+    state = _push_worker_state
+    estimates = personalized_pagerank_push(
+        state['adjacency'], seed, state['d'], state['eps'],
+        state['transposed'], state['direction'], state['out_degrees'])
+    top = heapq.nlargest(state['top_k'], estimates.items(),
+                         key=lambda item: item[1])
+    return seed, top
+
+def personalized_pagerank(adjacency, seeds, d=0.85, eps=1e-6, top_k=10,
+                          direction='forward', n_workers=None):
+    """
+    Runs personalized_pagerank_push for many seed nodes, divided over worker
+    processes, and keeps the top_k nodes of each seed.
+
+    Parameters
+    -----------
+    adjacency : scipy.sparse.csr_matrix, see network_to_csr
+    seeds : list of row indices of the seed nodes
+    d, eps, direction : see personalized_pagerank_push
+    top_k : number of nodes kept per seed
+    n_workers : number of worker processes, defaults to the number of CPUs
+
+    Returns
+    --------
+    top : dict of seed -> list of (node index, value) pairs, in decreasing
+          order of value
+    """
+    adjacency = sp.csr_matrix(adjacency)
+    transposed = sp.csr_matrix(adjacency.T) if direction == 'backward' else None
+    out_degrees = np.asarray(adjacency.sum(axis=1)).ravel()
+    with Pool(n_workers, initializer=_init_push_worker,
+              initargs=(adjacency, transposed, out_degrees, d, eps, top_k,
+                        direction)) as pool:
+        return dict(pool.imap_unordered(_push_worker, seeds,
+                                        chunksize=max(1, len(seeds) // 100)))
+
+def pagerank_sparse(network, d=0.85, tol=1e-10, max_iter=100,
+                    dtype=np.float64):
+    """
+    Calculates PageRank of a networkx graph with pagerank_csr.
+
+    Parameters
+    -----------
+    network : a networkx graph object
+    d, tol, max_iter, dtype : see pagerank_csr
+
+    Returns
+    --------
+    page_rank : dictionary of node PageRank values
+    n_iter : number of iterations performed
+    residuals : list of the L1 changes after each iteration
+    """
+    adjacency, nodes = network_to_csr(network)
+    x, n_iter, residuals = pagerank_csr(adjacency, d, tol, max_iter, dtype)
+    return dict(zip(nodes, x)), n_iter, residuals
+
+def edgelist_to_blocks(path, prefix, n_blocks=16, chunk_size=10**6,
+                       relabel=True):
+    """
+    Converts a text edge list into binary edge blocks for
+    pagerank_out_of_core, reading the file in chunks of chunk_size lines so
+    that the links are never all in memory at once.
+
+    Node v is assigned to destination block v % n_blocks, and block b is
+    stored in the file prefix + '.block<b>.bin' as int64 pairs (source,
+    v // n_blocks) for all links source -> v into the block. The out-degrees
+    are saved in prefix + '.out_degree.npy', the node labels in the order of
+    their indices in prefix + '.nodes.txt' and the sizes in
+    prefix + '.meta.json'.
+
+    Parameters
+    -----------
+    path : path of the edge list, one link 'source target ...' per line;
+           further columns (e.g. '{}' written by nx.write_edgelist) and lines
+           starting with '#' are ignored
+    prefix : path prefix of the output files
+    n_blocks : number of destination blocks
+    chunk_size : number of lines read at a time
+    relabel : if True, the node labels are mapped to indices 0..n-1 in the
+              order of appearance, which keeps a dictionary of all labels in
+              memory. If False, the labels must already be non-negative
+              integers and are used as the indices.
+
+    Returns
+    --------
+    meta : dict with the number of nodes, links and blocks
+    """
+    block_paths = [f'{prefix}.block{b}.bin' for b in range(n_blocks)]
+    block_files = [open(block_path, 'wb') for block_path in block_paths]
+    node_index = {}
+    out_degree = np.zeros(0, dtype=np.int64)
+    n_edges = 0
+    max_index = -1
+    try:
+        with open(path) as f:
+            while True:
+                lines = list(itertools.islice(f, chunk_size))
+                if not lines:
+                    break
+                pairs = [line.split()[:2] for line in lines
+                         if line.strip() and not line.startswith('#')]
+                if not pairs:
+                    continue
+                if relabel:
+                    edges = np.array(
+                        [[node_index.setdefault(label, len(node_index))
+                          for label in pair] for pair in pairs],
+                        dtype=np.int64)
+                else:
+                    edges = np.array(pairs, dtype=np.int64)
+                sources, targets = edges[:, 0], edges[:, 1]
+
+                counts = np.bincount(sources)
+                if len(counts) > len(out_degree):
+                    out_degree = np.concatenate(
+                        (out_degree,
+                         np.zeros(len(counts) - len(out_degree), np.int64)))
+                out_degree[:len(counts)] += counts
+
+                blocks = targets % n_blocks
+                order = np.argsort(blocks, kind='stable')
+                edges = np.column_stack(
+                    (sources[order], targets[order] // n_blocks))
+                bounds = np.searchsorted(blocks[order], np.arange(n_blocks + 1))
+                for b in range(n_blocks):
+                    block_files[b].write(edges[bounds[b]:bounds[b + 1]].tobytes())
+                n_edges += len(edges)
+                max_index = max(max_index, sources.max(), targets.max())
+    finally:
+        for block_file in block_files:
+            block_file.close()
+
+    if relabel:
+        n_nodes = len(node_index)
+        with open(prefix + '.nodes.txt', 'w') as f:
+            for label in node_index:  # dicts keep the insertion order
+                f.write(label + '\n')
+    else:
+        n_nodes = int(max_index) + 1
+    out_degree = np.concatenate(
+        (out_degree, np.zeros(n_nodes - len(out_degree), np.int64)))
+    np.save(prefix + '.out_degree.npy', out_degree)
+    meta = {'n_nodes': n_nodes, 'n_edges': n_edges, 'n_blocks': n_blocks}
+    with open(prefix + '.meta.json', 'w') as f:
+        json.dump(meta, f)
+    return meta
+
+def pagerank_out_of_core(prefix, d=0.85, tol=1e-10, max_iter=100,
+                         dtype=np.float64, chunk_size=10**7):
+    """
+    Calculates PageRank with power iteration on a network stored by
+    edgelist_to_blocks, without loading the links into memory.
+
+    The edge blocks are memory-mapped and streamed once per iteration, in
+    slices of chunk_size links, so only the PageRank vectors, the
+    out-degrees and one slice of links are held in memory. The iteration is
+    the same as in pagerank_csr.
+
+    Parameters
+    -----------
+    prefix : path prefix given to edgelist_to_blocks
+    d, tol, max_iter, dtype : see pagerank_csr
+    chunk_size : number of links processed at a time
+
+    Returns
+    --------
+    x : np.array of PageRank values in the order of the node indices, see
+        the file prefix + '.nodes.txt' for the labels
+    n_iter : number of iterations performed
+    residuals : list of the L1 changes after each iteration
+    """
+    with open(prefix + '.meta.json') as f:
+        meta = json.load(f)
+    n_nodes, n_blocks = meta['n_nodes'], meta['n_blocks']
+    out_degree = np.load(prefix + '.out_degree.npy')
+    dangling = out_degree == 0
+    inv_out_degree = np.zeros(n_nodes, dtype=dtype)
+    inv_out_degree[~dangling] = 1 / out_degree[~dangling]
+    blocks = []
+    for b in range(n_blocks):
+        block_path = f'{prefix}.block{b}.bin'
+        if os.path.getsize(block_path) > 0:
+            blocks.append(np.memmap(block_path, dtype=np.int64,
+                                    mode='r').reshape(-1, 2))
+        else:
+            blocks.append(np.zeros((0, 2), dtype=np.int64))
+
+    x = np.full(n_nodes, 1.0 / n_nodes, dtype=dtype)
+    residuals = []
+    for _ in range(max_iter):
+        y = x * inv_out_degree
+        x_new = np.zeros(n_nodes, dtype=dtype)
+        for b, edges in enumerate(blocks):
+            x_block = x_new[b::n_blocks]  # a view, updated in place
+            for start in range(0, len(edges), chunk_size):
+                chunk = np.asarray(edges[start:start + chunk_size])
+                x_block += np.bincount(chunk[:, 1], weights=y[chunk[:, 0]],
+                                       minlength=len(x_block)).astype(dtype)
+        x_new *= d
+        x_new += (d * x[dangling].sum() + 1 - d) / n_nodes
+        residuals.append(float(np.abs(x_new - x).sum()))
+        x = x_new
+        if residuals[-1] < tol:
+            break
+    return x, len(residuals), residuals
+
+def pagerank_random_walkers(network, d, n_steps, n_walkers=1000, seed=None):
+    """
+    Returns the PageRank value of each node, estimated like in pageRank from
+    the fraction of time random walkers spend in each node, but with
+    n_walkers walkers that are moved together with array operations. A
+    walker teleports to a random node with probability 1-d, and always when
+    its node has no out-links.
+
+    Parameters
+    -----------
+    network : a networkx graph object
+    d : damping factor of the simulation
+    n_steps : total number of steps of all walkers together (rounded up to a
+              multiple of n_walkers)
+    n_walkers : number of simultaneous random walkers
+    seed : seed of the random number generator
+
+    Returns
+    --------
+    page_rank: dictionary of node PageRank values (fraction of time spent in
+               each node)
+    """
+    rng = np.random.RandomState(seed)
+    adjacency, nodes = network_to_csr(network)
+    n_nodes = len(nodes)
+    indptr, indices = adjacency.indptr, adjacency.indices
+    out_degree = np.diff(indptr)
+
+    n_rounds = int(np.ceil(n_steps / float(n_walkers)))
+    # positions are collected into a buffer that is counted with bincount
+    # whenever it holds about n_nodes visits
+    rounds_per_count = max(1, n_nodes // n_walkers)
+    buffer = np.empty((rounds_per_count, n_walkers), dtype=indices.dtype)
+    visits = np.zeros(n_nodes, dtype=np.int64)
+
+    walkers = rng.randint(0, n_nodes, n_walkers)
+    for step in range(n_rounds):
+        buffer[step % rounds_per_count] = walkers
+        if step % rounds_per_count == rounds_per_count - 1 or step == n_rounds - 1:
+            visits += np.bincount(buffer[:step % rounds_per_count + 1].ravel(),
+                                  minlength=n_nodes)
+
+        degree = out_degree[walkers]
+        teleport = (rng.random_sample(n_walkers) > d) | (degree == 0)
+        walkers[teleport] = rng.randint(0, n_nodes, np.count_nonzero(teleport))
+        follow = ~teleport
+        offsets = (rng.random_sample(np.count_nonzero(follow))
+                   * degree[follow]).astype(np.int64)
+        walkers[follow] = indices[indptr[walkers[follow]] + offsets]
+
+    return dict(zip(nodes, visits / float(visits.sum())))
+
 def visualize_network(network, node_positions, cmap='OrRd',
-                      node_size=3000, node_colors=[], with_labels=True,title=""):
+                      node_size=3000, node_colors=[], with_labels=True,title="",
+                      edge_density=False, arrows=None):
     """
-    Visualizes the given network using networkx.draw and saves it to the given
-    path.
+    Visualizes the given network with network_drawing.draw_network, which
+    draws all links as one LineCollection and all nodes as one scatter.
 
     Parameters
     ----------
@@ -156,20 +894,36 @@ def visualize_network(network, node_positions, cmap='OrRd',
     node_colors : a list of node colors
     with_labels : should node labels be drawn or not, boolean
     title: title of the figure, string
+    edge_density : if True, the links are drawn as an image of their density
+      instead of lines, for networks with too many links to tell apart
+    arrows : should the links of a directed network be drawn as arrows,
+      boolean; the arrows are drawn one by one by networkx, so by default
+      they are only drawn for directed networks with at most 1000 links
     """
+    if arrows is None:
+        arrows = network.is_directed() and network.number_of_edges() <= 1000
+    arrows = arrows and not edge_density
+    geometry = network_drawing.network_geometry(network, node_positions)
+    density = network_drawing.link_density(geometry) if edge_density else None
+
     fig = plt.figure(figsize=(15, 10))
     ax = fig.add_subplot(111)
-    if node_colors:
-        nx.draw(network, pos = node_positions, cmap = cmap, node_size = node_size, node_color = node_colors, with_labels = with_labels)
+    if arrows:
+        nx.draw_networkx_edges(network, node_positions, ax=ax,
+                               node_size=node_size, arrows=True)
+    network_drawing.draw_network(ax, geometry,
+                                 node_colors if len(node_colors) else None,
+                                 cmap=cmap, node_size=node_size,
+                                 edge_density=density, draw_links=not arrows)
+    if with_labels:
+        nx.draw_networkx_labels(network, node_positions, ax=ax)
+    if len(node_colors):
         add_colorbar(node_colors)
-    else:
-        nx.draw(network, pos=node_positions, cmap=cmap, node_size=node_size,
-                with_labels=with_labels)
     ax.set_title(title)
     plt.tight_layout()
     return fig
 
-def investigate_d(network, ds, colors, n_steps):
+def investigate_d(network, ds, colors, n_steps=None):
     """
     Calculates PageRank at different values of the damping factor d and
     visualizes and saves results for interpretation
@@ -180,25 +934,34 @@ def investigate_d(network, ds, colors, n_steps):
     ds : a list of d values
     colors : visualization color for PageRank at each d, 
              must have same length as ds
-    n_steps : int; number of steps taken in random walker algorithm
+    n_steps : int; number of steps taken in random walker algorithm. If
+              None, PageRank is solved for all d at once with
+              pagerank_multi_csr instead of running the random walker.
     """
     #import pdb; pdb.set_trace()
     nodes = network.nodes()
     n_nodes = len(network.nodes())
     fig = plt.figure(figsize=(10, 8))
     ax = fig.add_subplot(111)
-        
+
+    if n_steps is None:
+        adjacency, node_list = network_to_csr(network)
+        pr_matrix, _, _ = pagerank_multi_csr(adjacency, ds, max_iter=1000)
+
     for i in range(len(ds)):
         current_d = ds[i]
         current_colour = colors[i]
-        pr = pageRank(network = network, d = current_d, n_steps = n_steps)
-        
+        if n_steps is None:
+            pr = dict(zip(node_list, pr_matrix[:, i]))
+        else:
+            pr = pageRank(network = network, d = current_d, n_steps = n_steps)
+
         current_plot = np.zeros(n_nodes)
         for node in pr:
             pr_value = pr[node] 
             current_plot[int(node)] = pr_value
         plt.plot(current_plot, label=np.round(current_d, 2), color=current_colour)
-    
+
     ax.set_xlabel(r'Node index')
     ax.set_ylabel(r'PageRank')
     ax.set_title(r'PageRank with different damping factors')
@@ -278,20 +1041,29 @@ if __name__ == '__main__':
     # Investigating the running time of the power iteration fuction
     num_tests = 3
     # YOUR CODE HERE
-    k5net = nx.DiGraph() # TODO: replace with a test network of suitable size
-    # TODO: Print results: how many seconds were taken for the test network of
-    # 10**4 nodes, how many hours would a 26*10**6 nodes network take?
+    k5net = nx.gnm_random_graph(10**4, 5 * 10**4, directed=True)
+    pi_time = min(timeit.repeat(lambda: pagerank_poweriter(k5net, d, n_iterations),
+                                number=1, repeat=num_tests))
+    print(f'Power iteration on 10**4 nodes: {pi_time:.2f} s, '
+          f'26*10**6 nodes would take about {pi_time * 2600 / 3600:.1f} h')
+    # see benchmark_pagerank.py for the scaling of all the implementations
 
 
     # Investigating the running time of the random walker function
     n_nodes = 10**4
     # YOUR CODE HERE
-    n_steps = 0 # TODO: set such number of steps that each node gets visited on average 1000 times
+    n_steps = 1000 * n_nodes # each node gets visited on average 1000 times
+    rw_net = nx.gnm_random_graph(n_nodes, 5 * n_nodes, directed=True)
+    rw_time = timeit.timeit(
+        lambda: pagerank_random_walkers(rw_net, d, n_steps, n_walkers=10**4),
+        number=1)
+    print(f'Vectorized random walkers, {n_steps} steps on {n_nodes} nodes: '
+          f'{rw_time:.2f} s')
 
     # Investigating effects of d:
     ds = np.arange(0, 1.2, 0.2)
     colors = ['b', 'r', 'g', 'm', 'k', 'c']
-    investigate_d(network=network, ds=ds, colors=colors, n_steps=10000)
+    investigate_d(network=network, ds=ds, colors=colors)
     
     
     network_path_wp = './wikipedia_network.edg' # TODO: replace, set the correct network path
@@ -300,6 +1072,25 @@ if __name__ == '__main__':
     network_wp = nx.read_edgelist(network_path_wp, create_using=nx.DiGraph())
 
     pageRank_wp = dict(nx.pagerank(network_wp))
+
+    # The same with the sparse matrix implementation
+    pageRank_wp_sparse, n_iter, residuals = pagerank_sparse(network_wp)
+    print(f'Sparse PageRank converged in {n_iter} iterations '
+          f'(last L1 change {residuals[-1]:.2e}), largest difference to '
+          f'networkx: {max(abs(pageRank_wp_sparse[p] - pageRank_wp[p]) for p in pageRank_wp):.2e}')
+
+    # The same out of core, for networks that do not fit in memory; the
+    # edge blocks are written to a temporary directory that is removed
+    # afterwards
+    with tempfile.TemporaryDirectory() as block_dir:
+        block_prefix = os.path.join(block_dir, 'wikipedia_network')
+        edgelist_to_blocks(network_path_wp, block_prefix, n_blocks=4)
+        x_wp, n_iter, residuals = pagerank_out_of_core(block_prefix)
+        with open(block_prefix + '.nodes.txt') as f:
+            nodes_wp = f.read().splitlines()
+    print(f'Out-of-core PageRank converged in {n_iter} iterations, largest '
+          f'difference to networkx: '
+          f'{max(abs(x - pageRank_wp[p]) for p, x in zip(nodes_wp, x_wp)):.2e}')
     indegree_wp = dict(network_wp.in_degree())
     outdegree_wp = dict(network_wp.out_degree())
     if pageRank_wp is not {}:
@@ -307,6 +1098,16 @@ if __name__ == '__main__':
         print('---Highest PageRank:---')
         for p in highest_pr:
             print(pageRank_wp[p], ":", p)
+
+        # Pages most related to the highest PageRank pages
+        adjacency_wp, nodes_wp = network_to_csr(network_wp)
+        node_index_wp = {node: i for i, node in enumerate(nodes_wp)}
+        related = personalized_pagerank(
+            adjacency_wp, [node_index_wp[p] for p in highest_pr], top_k=6)
+        for p in highest_pr:
+            print(f'---Most related to {p}:---')
+            for i, value in related[node_index_wp[p]][1:]:
+                print(value, ":", nodes_wp[i])
     if indegree_wp is not {}:
         highest_id = sorted(indegree_wp, key=lambda k: indegree_wp[k])[::-1][0:5]
         print('---Highest In-degree:---')
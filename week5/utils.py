@@ -3,6 +3,8 @@ import matplotlib as mpl
 import matplotlib.pylab as plt
 import networkx as nx
 
+import network_drawing
+
 ###############################################################
 # Code that is given to you, and does not need to be modified #
 ###############################################################
@@ -28,10 +30,11 @@ def add_colorbar(cvalues, cmap='OrRd', cb_ax=None):
         cb = mpl.colorbar.ColorbarBase(cb_ax, cmap=cmap, norm=norm, orientation='vertical')
 
 def visualize_network(network, node_positions, cmap='OrRd',
-                      node_size=3000, node_colors=[], with_labels=True,title=""):
+                      node_size=3000, node_colors=[], with_labels=True,title="",
+                      edge_density=False, arrows=None):
     """
-    Visualizes the given network using networkx.draw and saves it to the given
-    path.
+    Visualizes the given network with network_drawing.draw_network, which
+    draws all links as one LineCollection and all nodes as one scatter.
 
     Parameters
     ----------
@@ -42,15 +45,31 @@ def visualize_network(network, node_positions, cmap='OrRd',
     node_colors : a list of node colors
     with_labels : should node labels be drawn or not, boolean
     title: title of the figure, string
+    edge_density : if True, the links are drawn as an image of their density
+      instead of lines, for networks with too many links to tell apart
+    arrows : should the links of a directed network be drawn as arrows,
+      boolean; the arrows are drawn one by one by networkx, so by default
+      they are only drawn for directed networks with at most 1000 links
     """
+    if arrows is None:
+        arrows = network.is_directed() and network.number_of_edges() <= 1000
+    arrows = arrows and not edge_density
+    geometry = network_drawing.network_geometry(network, node_positions)
+    density = network_drawing.link_density(geometry) if edge_density else None
+
     fig = plt.figure(figsize=(15, 10))
     ax = fig.add_subplot(111)
-    if node_colors:
-        nx.draw(network, pos = node_positions, cmap = cmap, node_size = node_size, node_color = node_colors, with_labels = with_labels)
+    if arrows:
+        nx.draw_networkx_edges(network, node_positions, ax=ax,
+                               node_size=node_size, arrows=True)
+    network_drawing.draw_network(ax, geometry,
+                                 node_colors if len(node_colors) else None,
+                                 cmap=cmap, node_size=node_size,
+                                 edge_density=density, draw_links=not arrows)
+    if with_labels:
+        nx.draw_networkx_labels(network, node_positions, ax=ax)
+    if len(node_colors):
         add_colorbar(node_colors)
-    else:
-        nx.draw(network, pos=node_positions, cmap=cmap, node_size=node_size,
-                with_labels=with_labels)
     ax.set_title(title)
     plt.tight_layout()
     return fig
\ No newline at end of file
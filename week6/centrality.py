@@ -0,0 +1,863 @@
+"""
+Centrality measures computed on a CSR (compressed sparse row) copy of an
+undirected networkx graph, with the values returned as numpy arrays in the
+order of network.nodes().
+
+traversal_centralities runs one breadth-first search per source node and
+collects betweenness (Brandes' dependency accumulation), closeness, harmonic
+centrality and eccentricity from the same search. The searches are
+level-synchronous and vectorized: all links leaving the current BFS level
+are expanded at once with numpy. The sources are split over a process pool
+whose workers read the CSR arrays from shared memory, so the graph is not
+pickled to each worker.
+
+eigenvector_centrality (ARPACK), katz_centrality and hits (power methods on
+the sparse adjacency matrix) accept the values computed before a small change
+of the network as a starting vector, and then converge in a few iterations.
+
+core_decomposition finds the k-shells in O(M) time, and core_insert_edge and
+core_remove_edge keep the core numbers up to date when links change.
+
+Usage:
+
+measures = traversal_centralities(network)
+betweenness = measures['betweenness']
+x = eigenvector_centrality(network)
+x = eigenvector_centrality(changed_network, v0=x)
+"""
+from collections import deque
+from multiprocessing import Pool, shared_memory
+import functools
+import heapq
+import itertools
+
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+
+def network_to_csr(network, weight=None):
+    """
+    Returns the adjacency matrix of an undirected network in CSR form, as
+    plain arrays. Self-loops are dropped.
+
+    Parameters
+    ----------
+    network : networkx.Graph
+    weight : str, optional
+      edge attribute used as the link weight, by default all weights are one
+
+    Returns
+    -------
+    indptr : np.array of ints
+      the neighbors of node i are indices[indptr[i]:indptr[i + 1]]
+    indices : np.array of ints
+    weights : np.array of floats, the weights of the links in indices
+    nodes : list of nodes in the order of the node indices
+    """
+    nodes = list(network.nodes())
+    node_index = {node: i for i, node in enumerate(nodes)}
+    edges = [(node_index[u], node_index[v], w)
+             for u, v, w in network.edges(data=weight, default=1) if u != v]
+    sources = np.array([u for u, _, _ in edges], dtype=np.int64)
+    targets = np.array([v for _, v, _ in edges], dtype=np.int64)
+    weights = np.array([w if weight is not None else 1 for _, _, w in edges],
+                       dtype=np.float64)
+    adjacency = sp.csr_matrix(
+        (np.concatenate((weights, weights)),
+         (np.concatenate((sources, targets)), np.concatenate((targets, sources)))),
+        shape=(len(nodes), len(nodes)))
+    adjacency.sort_indices()
+    return (adjacency.indptr.astype(np.int64), adjacency.indices.astype(np.int64),
+            adjacency.data, nodes)
+
+
+def share_arrays(arrays):
+    """
+    Copies arrays into shared memory blocks that worker processes can attach
+    to with attach_arrays.
+
+    Parameters
+    ----------
+    arrays : list of np.arrays
+
+    Returns
+    -------
+    blocks : list of SharedMemory objects; call close() and unlink() on each
+      of them when the workers are done
+    specs : list of (name, shape, dtype) tuples to pass to attach_arrays
+    """
+    blocks, specs = [], []
+    for array in arrays:
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+        blocks.append(block)
+        specs.append((block.name, array.shape, array.dtype.str))
+    return blocks, specs
+
+
+def attach_arrays(specs):
+    """
+    Returns views of the arrays in the shared memory blocks created by
+    share_arrays.
+
+    Parameters
+    ----------
+    specs : list of (name, shape, dtype) tuples
+
+    Returns
+    -------
+    blocks : list of SharedMemory objects, must be kept alive while the
+      arrays are used
+    arrays : list of np.arrays
+    """
+    blocks = [shared_memory.SharedMemory(name=name) for name, _, _ in specs]
+    arrays = [np.ndarray(shape, dtype, buffer=block.buf)
+              for block, (_, shape, dtype) in zip(blocks, specs)]
+    return blocks, arrays
+
+
+def _expand(indptr, indices, frontier):
+    """
+    Returns the links leaving the frontier nodes as arrays of start nodes,
+    end nodes and positions of the links in indices.
+    """
+    starts = indptr[frontier]
+    counts = indptr[frontier + 1] - starts
+    offsets = np.cumsum(counts) - counts
+    positions = (np.repeat(starts - offsets, counts) +
+                 np.arange(offsets[-1] + counts[-1] if len(counts) else 0))
+    return np.repeat(frontier, counts), indices[positions], positions
+
+
+def bfs_dependencies(indptr, indices, source):
+    """
+    Runs a breadth-first search from source and accumulates the dependencies
+    of Brandes' betweenness algorithm.
+
+    Parameters
+    ----------
+    indptr, indices : CSR arrays, see network_to_csr
+    source : int
+
+    Returns
+    -------
+    distance : np.array of ints, -1 for nodes that are not reached
+    delta : np.array of floats, the dependency of source on each node
+    dag : list of (starts, ends, positions, flows) tuples, one per BFS
+      level, for the links of the shortest path DAG; flows are the edge
+      dependencies of the links
+    """
+    n_nodes = len(indptr) - 1
+    distance = np.full(n_nodes, -1, dtype=np.int64)
+    sigma = np.zeros(n_nodes)
+    distance[source] = 0
+    sigma[source] = 1
+    frontier = np.array([source])
+    levels = []
+    while len(frontier):
+        starts, ends, positions = _expand(indptr, indices, frontier)
+        new = distance[ends] == -1
+        starts, ends, positions = starts[new], ends[new], positions[new]
+        np.add.at(sigma, ends, sigma[starts])
+        frontier = np.unique(ends)
+        distance[frontier] = distance[starts[0]] + 1 if len(starts) else 0
+        levels.append((starts, ends, positions))
+
+    delta = np.zeros(n_nodes)
+    dag = []
+    for starts, ends, positions in reversed(levels):
+        flows = sigma[starts] / sigma[ends] * (1 + delta[ends])
+        np.add.at(delta, starts, flows)
+        dag.append((starts, ends, positions, flows))
+    return distance, delta, dag
+
+
+_worker_state = {}
+
+
+def _init_worker(specs):
+    _worker_state['blocks'], _worker_state['arrays'] = attach_arrays(specs)
+
+
+def _close_worker():
+    # the array views must be released before the blocks can be closed
+    _worker_state.pop('arrays', None)
+    for block in _worker_state.pop('blocks', []):
+        block.close()
+    _worker_state.clear()
+
+
+def _traversal_worker(sources):
+    """
+    Runs the searches from a chunk of sources and returns the summed
+    betweenness dependencies and the distance based measures of the sources.
+    """
+    indptr, indices = _worker_state['arrays'][:2]
+    n_nodes = len(indptr) - 1
+    betweenness = np.zeros(n_nodes)
+    closeness = np.zeros(len(sources))
+    harmonic = np.zeros(len(sources))
+    eccentricity = np.zeros(len(sources), dtype=np.int64)
+    for i, source in enumerate(sources):
+        distance, delta, _ = bfs_dependencies(indptr, indices, source)
+        delta[source] = 0
+        betweenness += delta
+
+        reached = distance[distance > 0]
+        if len(reached):
+            # Wasserman-Faust scaling for disconnected networks, as networkx
+            closeness[i] = (len(reached) / reached.sum() *
+                            len(reached) / (n_nodes - 1))
+            harmonic[i] = (1.0 / reached).sum()
+            eccentricity[i] = reached.max()
+    return sources, betweenness, closeness, harmonic, eccentricity
+
+
+def _map_chunks(worker, specs, n_nodes, n_workers, chunk_size):
+    """
+    Calls worker on chunks of the source nodes, in a pool of n_workers
+    processes attached to the shared arrays, or in this process if n_workers
+    is 1. Yields the results in arbitrary order.
+    """
+    chunks = [np.arange(start, min(start + chunk_size, n_nodes))
+              for start in range(0, n_nodes, chunk_size)]
+    if n_workers == 1:
+        _init_worker(specs)
+        try:
+            for chunk in chunks:
+                yield worker(chunk)
+        finally:
+            _close_worker()
+        return
+    with Pool(n_workers, initializer=_init_worker, initargs=(specs,)) as pool:
+        for result in pool.imap_unordered(worker, chunks):
+            yield result
+
+
+def traversal_centralities(network, normalized=True, n_workers=None,
+                           chunk_size=None):
+    """
+    Calculates betweenness, closeness, harmonic centrality and eccentricity
+    of all nodes of an undirected network with one breadth-first search per
+    node.
+
+    Parameters
+    ----------
+    network : networkx.Graph
+    normalized : bool
+      if True, betweenness is normalized by (n-1)(n-2) as in
+      nx.betweenness_centrality, otherwise each pair is counted once
+    n_workers : int, optional
+      number of worker processes, defaults to the number of CPUs; with 1 the
+      searches run in this process
+    chunk_size : int, optional
+      number of sources given to a worker at a time
+
+    Returns
+    -------
+    measures : dict of np.arrays in the order of network.nodes(), with keys
+      'betweenness'
+      'closeness' : as nx.closeness_centrality, which scales the values of
+        nodes in small components down (Wasserman and Faust)
+      'harmonic' : sum of the inverse distances to the other nodes
+      'eccentricity' : largest distance to a reachable node
+    """
+    indptr, indices, _, nodes = network_to_csr(network)
+    n_nodes = len(nodes)
+    measures = {'betweenness': np.zeros(n_nodes),
+                'closeness': np.zeros(n_nodes),
+                'harmonic': np.zeros(n_nodes),
+                'eccentricity': np.zeros(n_nodes, dtype=np.int64)}
+    if n_nodes == 0:
+        return measures
+    if chunk_size is None:
+        chunk_size = max(1, n_nodes // (4 * (n_workers or 8)))
+
+    blocks, specs = share_arrays([indptr, indices])
+    try:
+        for sources, betweenness, closeness, harmonic, eccentricity in _map_chunks(
+                _traversal_worker, specs, n_nodes, n_workers, chunk_size):
+            measures['betweenness'] += betweenness
+            measures['closeness'][sources] = closeness
+            measures['harmonic'][sources] = harmonic
+            measures['eccentricity'][sources] = eccentricity
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    if normalized:
+        if n_nodes > 2:
+            measures['betweenness'] /= (n_nodes - 1) * (n_nodes - 2)
+    else:
+        measures['betweenness'] /= 2
+    return measures
+
+
+def _csr_edge_ids(network, nodes):
+    """
+    Returns for each entry of the indices array of network_to_csr the index
+    of the link in list(network.edges()).
+    """
+    node_index = {node: i for i, node in enumerate(nodes)}
+    edges = [(node_index[u], node_index[v], i)
+             for i, (u, v) in enumerate(network.edges()) if u != v]
+    sources = np.array([u for u, _, _ in edges], dtype=np.int64)
+    targets = np.array([v for _, v, _ in edges], dtype=np.int64)
+    edge_ids = np.array([i for _, _, i in edges], dtype=np.int64)
+    # the ids are shifted by one so that link 0 is not an implicit zero
+    ids = sp.csr_matrix(
+        (np.concatenate((edge_ids, edge_ids)) + 1,
+         (np.concatenate((sources, targets)), np.concatenate((targets, sources)))),
+        shape=(len(nodes), len(nodes)))
+    ids.sort_indices()
+    return ids.data - 1
+
+
+def dijkstra_dependencies(neighbors, source):
+    """
+    Runs Dijkstra's algorithm from source and accumulates the dependencies
+    of Brandes' betweenness algorithm, as in networkx: path lengths are
+    compared exactly when counting shortest paths.
+
+    Parameters
+    ----------
+    neighbors : list of lists of (node, weight, position) tuples, the links
+      of each node and their positions in the CSR arrays
+    source : int
+
+    Returns
+    -------
+    delta : dict mapping the reached nodes to the dependency of source on
+      them
+    flows : dict mapping the CSR positions of the links of the shortest
+      path DAG to their edge dependencies
+    """
+    sigma = {source: 1.0}
+    predecessors = {source: []}
+    distance = {}
+    seen = {source: 0}
+    order = []
+    counter = itertools.count()
+    heap = [(0, next(counter), source)]
+    while heap:
+        d, _, v = heapq.heappop(heap)
+        if v in distance:
+            continue
+        distance[v] = d
+        order.append(v)
+        for w, weight, position in neighbors[v]:
+            d_new = d + weight
+            if w not in distance and (w not in seen or d_new < seen[w]):
+                seen[w] = d_new
+                heapq.heappush(heap, (d_new, next(counter), w))
+                sigma[w] = sigma[v]
+                predecessors[w] = [(v, position)]
+            elif d_new == seen[w]:
+                sigma[w] += sigma[v]
+                predecessors[w].append((v, position))
+
+    delta = dict.fromkeys(order, 0.0)
+    flows = {}
+    for w in reversed(order):
+        coefficient = (1 + delta[w]) / sigma[w]
+        for v, position in predecessors[w]:
+            flow = sigma[v] * coefficient
+            flows[position] = flow
+            delta[v] += flow
+    return delta, flows
+
+
+def _betweenness_worker(sources, weighted, n_edges):
+    """
+    Returns the summed node and edge dependencies of a chunk of sources.
+    """
+    indptr, indices, weights, edge_ids = _worker_state['arrays']
+    n_nodes = len(indptr) - 1
+    node_betweenness = np.zeros(n_nodes)
+    position_flows = np.zeros(len(indices))
+
+    if weighted:
+        if 'neighbors' not in _worker_state:
+            # built once per worker, lists are faster to traverse in Python
+            bounds = indptr.tolist()
+            _worker_state['neighbors'] = [
+                list(zip(indices[a:b].tolist(), weights[a:b].tolist(), range(a, b)))
+                for a, b in zip(bounds[:-1], bounds[1:])]
+        neighbors = _worker_state['neighbors']
+        for source in sources.tolist():
+            delta, flows = dijkstra_dependencies(neighbors, source)
+            delta[source] = 0.0
+            node_betweenness[list(delta)] += list(delta.values())
+            position_flows[list(flows)] += list(flows.values())
+    else:
+        for source in sources:
+            _, delta, dag = bfs_dependencies(indptr, indices, source)
+            delta[source] = 0
+            node_betweenness += delta
+            for _, _, positions, flows in dag:
+                # a link appears at most once per search
+                position_flows[positions] += flows
+
+    edge_betweenness = np.bincount(edge_ids, weights=position_flows,
+                                   minlength=n_edges)
+    return node_betweenness, edge_betweenness
+
+
+def betweenness_centrality(network, weight=None, normalized=True,
+                           n_workers=None, chunk_size=None):
+    """
+    Calculates the exact node and edge betweenness centralities of an
+    undirected network with Brandes' algorithm, in parallel.
+
+    The CSR arrays of the network are placed in shared memory once, the
+    source nodes are split into chunks over a process pool, and the partial
+    node and edge scores of the chunks are summed. Unweighted networks are
+    searched with the vectorized breadth-first search of
+    traversal_centralities; with weights, each worker runs Dijkstra's
+    algorithm on adjacency lists it builds once from the shared arrays.
+
+    Parameters
+    ----------
+    network : networkx.Graph
+    weight : str, optional
+      edge attribute used as the link length for weighted shortest paths
+    normalized : bool
+      if True, the node values are normalized by (n-1)(n-2) and the edge
+      values by n(n-1) as in networkx, otherwise each pair of nodes is
+      counted once
+    n_workers : int, optional
+      number of worker processes, defaults to the number of CPUs; with 1 the
+      searches run in this process
+    chunk_size : int, optional
+      number of sources given to a worker at a time
+
+    Returns
+    -------
+    node_betweenness : np.array in the order of network.nodes()
+    edge_betweenness : np.array in the order of network.edges()
+    """
+    indptr, indices, weights, nodes = network_to_csr(network, weight)
+    edge_ids = _csr_edge_ids(network, nodes)
+    n_nodes = len(nodes)
+    n_edges = network.number_of_edges()
+    node_betweenness = np.zeros(n_nodes)
+    edge_betweenness = np.zeros(n_edges)
+    if n_nodes == 0:
+        return node_betweenness, edge_betweenness
+    if chunk_size is None:
+        chunk_size = max(1, n_nodes // (4 * (n_workers or 8)))
+
+    worker = functools.partial(_betweenness_worker, weighted=weight is not None,
+                               n_edges=n_edges)
+    blocks, specs = share_arrays([indptr, indices, weights, edge_ids])
+    try:
+        for node_partial, edge_partial in _map_chunks(
+                worker, specs, n_nodes, n_workers, chunk_size):
+            node_betweenness += node_partial
+            edge_betweenness += edge_partial
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    if normalized:
+        if n_nodes > 2:
+            node_betweenness /= (n_nodes - 1) * (n_nodes - 2)
+        if n_nodes > 1:
+            edge_betweenness /= n_nodes * (n_nodes - 1)
+    else:
+        node_betweenness /= 2
+        edge_betweenness /= 2
+    return node_betweenness, edge_betweenness
+
+
+def adjacency_matrix(network, weight=None):
+    """
+    Returns the sparse adjacency matrix of the network, where element (i, j)
+    is the weight of the link from node i to node j. Undirected links are
+    stored in both directions; self-loops are kept.
+
+    Parameters
+    ----------
+    network : networkx graph
+    weight : str, optional
+      edge attribute used as the link weight, by default all weights are one
+
+    Returns
+    -------
+    adjacency : scipy.sparse.csr_matrix
+    nodes : list of nodes in the order of the rows
+    """
+    nodes = list(network.nodes())
+    node_index = {node: i for i, node in enumerate(nodes)}
+    edges = [(node_index[u], node_index[v], w if weight is not None else 1)
+             for u, v, w in network.edges(data=weight, default=1)]
+    sources = np.array([u for u, _, _ in edges], dtype=np.int64)
+    targets = np.array([v for _, v, _ in edges], dtype=np.int64)
+    weights = np.array([w for _, _, w in edges], dtype=np.float64)
+    if not network.is_directed():
+        loops = sources == targets
+        sources, targets, weights = (
+            np.concatenate((sources, targets[~loops])),
+            np.concatenate((targets, sources[~loops])),
+            np.concatenate((weights, weights[~loops])))
+    adjacency = sp.csr_matrix((weights, (sources, targets)),
+                              shape=(len(nodes), len(nodes)))
+    return adjacency, nodes
+
+
+def _leading_eigenvector(matrix, symmetric, tol, v0):
+    """
+    Returns the eigenvector of the eigenvalue with the largest real part,
+    normalized to unit length and a positive sum.
+
+    The default starting vector is uniform, as in the power iterations of
+    networkx. If the leading eigenvalue is degenerate (e.g. A A^T of a
+    bipartite network), the result is the projection of the starting vector
+    on its eigenspace, which is also what a power iteration converges to.
+    """
+    n_nodes = matrix.shape[0]
+    if v0 is None:
+        v0 = np.ones(n_nodes)
+    v0 = np.asarray(v0, dtype=np.float64)
+    if v0.shape != (n_nodes,):
+        # ARPACK does not check the length itself
+        raise ValueError(f'v0 must have one value per node ({n_nodes})')
+    if n_nodes < 10:
+        # ARPACK needs more than two dimensions, and dense is faster anyway
+        values, vectors = np.linalg.eig(matrix @ np.eye(n_nodes))
+        leading = vectors[:, np.isclose(values.real, values.real.max())]
+        vector = np.real(leading @ np.linalg.lstsq(leading, v0, rcond=None)[0])
+    elif symmetric:
+        vector = spla.eigsh(matrix, k=1, which='LA', tol=tol, v0=v0)[1][:, 0]
+    else:
+        vector = np.real(spla.eigs(matrix, k=1, which='LR', tol=tol, v0=v0)[1][:, 0])
+    if vector.sum() < 0:
+        vector = -vector
+    return vector / np.linalg.norm(vector)
+
+
+def eigenvector_centrality(network, tol=1e-10, v0=None, weight=None):
+    """
+    Calculates the eigenvector centrality of the nodes with the implicitly
+    restarted Lanczos (undirected networks) or Arnoldi (directed networks)
+    method of ARPACK.
+
+    Parameters
+    ----------
+    network : networkx graph
+    tol : relative accuracy of the leading eigenvalue
+    v0 : np.array, optional
+      starting vector, e.g. the centralities before a small change of the
+      network, which lets the solver converge in a few iterations
+    weight : str, optional
+      edge attribute used as the link weight
+
+    Returns
+    -------
+    eigenvector_centrality : np.array in the order of network.nodes(),
+      normalized to unit Euclidean length as nx.eigenvector_centrality. For
+      directed networks the centrality comes from the in-links.
+    """
+    adjacency, _ = adjacency_matrix(network, weight)
+    if adjacency.shape[0] == 0:
+        return np.zeros(0)
+    return _leading_eigenvector(adjacency.T.tocsr(), not network.is_directed(),
+                                tol, v0)
+
+
+def katz_centrality(network, alpha=0.1, beta=1.0, tol=1e-10, max_iter=1000,
+                    x0=None, weight=None):
+    """
+    Calculates the Katz centrality x = alpha A^T x + beta with a power method
+    on the sparse adjacency matrix.
+
+    Parameters
+    ----------
+    network : networkx graph
+    alpha : attenuation factor, must be smaller than one over the largest
+      eigenvalue of the adjacency matrix
+    beta : weight of the constant term
+    tol : the iteration stops when the L1 change of x is below n_nodes * tol,
+      as in nx.katz_centrality
+    max_iter : maximum number of iterations
+    x0 : np.array, optional
+      starting vector, e.g. the normalized centralities before a small
+      change of the network. It is rescaled by least squares to best fit the
+      unnormalized equation before iterating.
+    weight : str, optional
+      edge attribute used as the link weight
+
+    Returns
+    -------
+    katz_centrality : np.array in the order of network.nodes(), normalized
+      to unit Euclidean length
+    n_iter : number of iterations; n_iter == max_iter means that the
+      iteration did not converge
+    """
+    adjacency, _ = adjacency_matrix(network, weight)
+    n_nodes = adjacency.shape[0]
+    if n_nodes == 0:
+        return np.zeros(0), 0
+    transposed = adjacency.T.tocsr()
+
+    if x0 is None:
+        x = np.zeros(n_nodes)
+    else:
+        x = np.asarray(x0, dtype=np.float64)
+        residual = x - alpha * transposed.dot(x)
+        x = x * beta * residual.sum() / residual.dot(residual)
+
+    n_iter = 0
+    while n_iter < max_iter:
+        x_new = alpha * transposed.dot(x) + beta
+        n_iter += 1
+        change = np.abs(x_new - x).sum()
+        x = x_new
+        if change < n_nodes * tol:
+            break
+    return x / np.linalg.norm(x), n_iter
+
+
+def hits(network, tol=1e-10, max_iter=1000, h0=None, weight=None):
+    """
+    Calculates the hub and authority scores of the nodes with a power method
+    on the sparse adjacency matrix: a <- A^T h, h <- A a.
+
+    A power method is used instead of ARPACK because the leading eigenvalue
+    of A A^T is often degenerate (e.g. for bipartite networks such as trees
+    and lattices), and the power method then converges to the projection of
+    the starting vector on the leading eigenspace, like nx.hits.
+
+    Parameters
+    ----------
+    network : networkx graph
+    tol : the iteration stops when the L1 change of the hub scores is below
+      n_nodes * tol, as in nx.hits
+    max_iter : maximum number of iterations
+    h0 : np.array, optional
+      starting hub scores, e.g. the hub scores before a small change of the
+      network; defaults to uniform scores
+    weight : str, optional
+      edge attribute used as the link weight
+
+    Returns
+    -------
+    hubs : np.array in the order of network.nodes(), normalized to sum to
+      one as in nx.hits
+    authorities : np.array, normalized to sum to one
+    n_iter : number of iterations; n_iter == max_iter means that the
+      iteration did not converge
+    """
+    adjacency, _ = adjacency_matrix(network, weight)
+    n_nodes = adjacency.shape[0]
+    if n_nodes == 0:
+        return np.zeros(0), np.zeros(0), 0
+    transposed = adjacency.T.tocsr()
+
+    if h0 is None:
+        hubs = np.full(n_nodes, 1.0 / n_nodes)
+    else:
+        hubs = np.asarray(h0, dtype=np.float64)
+        hubs = hubs / hubs.sum()
+    authorities = np.zeros(n_nodes)
+
+    n_iter = 0
+    while n_iter < max_iter:
+        authorities = transposed.dot(hubs)
+        authorities /= authorities.max()
+        hubs_new = adjacency.dot(authorities)
+        hubs_new /= hubs_new.sum()
+        n_iter += 1
+        change = np.abs(hubs_new - hubs).sum()
+        hubs = hubs_new
+        if change < n_nodes * tol:
+            break
+    return hubs, authorities / authorities.sum(), n_iter
+
+
+def core_decomposition_csr(indptr, indices):
+    """
+    Calculates the core numbers (k-shells) of the nodes of an undirected
+    network without self-loops with the O(M) bucket algorithm of Batagelj
+    and Zaversnik.
+
+    The nodes are kept in an array sorted by their current degree, with the
+    start of each degree bucket stored separately, so that the node with
+    the smallest degree is always next and decreasing a degree only swaps
+    the node to the start of its bucket.
+
+    Parameters
+    ----------
+    indptr, indices : CSR arrays, see network_to_csr
+
+    Returns
+    -------
+    core : np.array of ints, the core number of each node
+    shell_sizes : np.array of ints, shell_sizes[k] is the number of nodes in
+      the k-shell
+    order : np.array of ints, the nodes in the order in which they are peeled
+      off, i.e. with non-decreasing core numbers
+    """
+    n_nodes = len(indptr) - 1
+    if n_nodes == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    degrees = np.diff(indptr)
+    # plain lists are faster than arrays to index one element at a time
+    indptr_list = indptr.tolist()
+    indices_list = indices.tolist()
+    degree = degrees.tolist()
+    order = np.argsort(degrees, kind='stable')
+    vert = order.tolist()
+    pos = np.empty(n_nodes, dtype=np.int64)
+    pos[order] = np.arange(n_nodes)
+    pos = pos.tolist()
+    bucket_start = np.concatenate(([0], np.cumsum(np.bincount(degrees))))
+    bucket_start = bucket_start.tolist()
+
+    for i in range(n_nodes):
+        v = vert[i]
+        degree_v = degree[v]
+        for u in indices_list[indptr_list[v]:indptr_list[v + 1]]:
+            degree_u = degree[u]
+            if degree_u > degree_v:
+                # move u to the start of its bucket and the bucket start
+                # past it, which moves u to the next lower bucket
+                position_u = pos[u]
+                position_w = bucket_start[degree_u]
+                w = vert[position_w]
+                if u != w:
+                    vert[position_u], vert[position_w] = w, u
+                    pos[u], pos[w] = position_w, position_u
+                bucket_start[degree_u] += 1
+                degree[u] = degree_u - 1
+
+    core = np.array(degree, dtype=np.int64)
+    return core, np.bincount(core), np.array(vert, dtype=np.int64)
+
+
+def core_decomposition(network):
+    """
+    Calculates the core numbers of the nodes of an undirected network with
+    core_decomposition_csr. Self-loops are ignored.
+
+    Parameters
+    ----------
+    network : networkx.Graph
+
+    Returns
+    -------
+    core : np.array of ints in the order of network.nodes()
+    shell_sizes : np.array of ints, see core_decomposition_csr
+    order : list of nodes in the order in which they are peeled off
+    """
+    indptr, indices, _, nodes = network_to_csr(network)
+    core, shell_sizes, order = core_decomposition_csr(indptr, indices)
+    return core, shell_sizes, [nodes[i] for i in order]
+
+
+def csr_to_neighbor_sets(indptr, indices):
+    """
+    Returns the neighbors of each node as a list of sets, the adjacency
+    structure used by core_insert_edge and core_remove_edge.
+    """
+    return [set(indices[indptr[i]:indptr[i + 1]].tolist())
+            for i in range(len(indptr) - 1)]
+
+
+def _peel_subcore(neighbors, core, roots, threshold):
+    """
+    Finds the nodes connected to roots through nodes with the core number
+    k = core[roots[0]] (the subcore), and repeatedly removes those with at
+    most threshold neighbors of core number >= k among the remaining ones.
+
+    Returns the remaining nodes of the subcore and the removed ones.
+    """
+    k = core[roots[0]]
+    subcore = set(roots)
+    queue = deque(roots)
+    while queue:
+        w = queue.popleft()
+        for x in neighbors[w]:
+            if core[x] == k and x not in subcore:
+                subcore.add(x)
+                queue.append(x)
+
+    support = {w: sum(1 for x in neighbors[w] if core[x] >= k)
+               for w in subcore}
+    removed = set()
+    queue = deque(w for w in subcore if support[w] <= threshold)
+    while queue:
+        w = queue.popleft()
+        if w in removed:
+            continue
+        removed.add(w)
+        for x in neighbors[w]:
+            if x in subcore and x not in removed:
+                support[x] -= 1
+                if support[x] <= threshold:
+                    queue.append(x)
+    return subcore - removed, removed
+
+
+def core_insert_edge(neighbors, core, u, v):
+    """
+    Adds the link (u, v) and updates the core numbers.
+
+    After an insertion only nodes whose core number equals
+    k = min(core[u], core[v]) and that are connected to the end point(s)
+    with that core number through such nodes can change, and their core
+    numbers grow by at most one (Sariyuce et al., Li et al.). Only this
+    subcore is visited.
+
+    Parameters
+    ----------
+    neighbors : list of sets, see csr_to_neighbor_sets; modified in place
+    core : list or np.array of the core numbers; modified in place
+    u, v : int, nodes that are not linked yet
+
+    Returns
+    -------
+    changed : list of the nodes whose core number grew by one
+    """
+    if u == v or v in neighbors[u]:
+        raise ValueError(f'cannot insert the link ({u}, {v})')
+    neighbors[u].add(v)
+    neighbors[v].add(u)
+    k = min(core[u], core[v])
+    roots = [w for w in (u, v) if core[w] == k]
+    promoted, _ = _peel_subcore(neighbors, core, roots, threshold=k)
+    for w in promoted:
+        core[w] += 1
+    return list(promoted)
+
+
+def core_remove_edge(neighbors, core, u, v):
+    """
+    Removes the link (u, v) and updates the core numbers. As for
+    core_insert_edge, only the subcore of the end point(s) with the smaller
+    core number k is visited, and core numbers drop by at most one.
+
+    Parameters
+    ----------
+    neighbors : list of sets, see csr_to_neighbor_sets; modified in place
+    core : list or np.array of the core numbers; modified in place
+    u, v : int, linked nodes
+
+    Returns
+    -------
+    changed : list of the nodes whose core number dropped by one
+    """
+    if v not in neighbors[u]:
+        raise ValueError(f'there is no link ({u}, {v}) to remove')
+    neighbors[u].discard(v)
+    neighbors[v].discard(u)
+    k = min(core[u], core[v])
+    roots = [w for w in (u, v) if core[w] == k]
+    _, demoted = _peel_subcore(neighbors, core, roots, threshold=k - 1)
+    for w in demoted:
+        core[w] -= 1
+    return list(demoted)
@@ -17,6 +17,8 @@ import matplotlib.pylab as plt
 from matplotlib import gridspec
 from colorbar_help import add_colorbar
 import pickle
+import centrality
+import network_drawing
 
 # ====================== FUNCTIONS USED BY THE MAIN CODE ===================
 #
@@ -63,7 +65,8 @@ def create_scatter(x_values, y_values, x_label, y_label, labels, markers):
 
 def visualize_on_network(network, node_values, coords_path,
                          titles, cmap='YlOrRd',
-                         node_size=50, font_size=8, scale=500):
+                         node_size=50, scale=500,
+                         edge_density=False):
     """
     Creates visualizations of the network with nodes color coded by each of the
     node values sets.
@@ -76,9 +79,11 @@ def visualize_on_network(network, node_values, coords_path,
     titles: list of strings
     cmap: string
     node_size: int
-    font_size: int
     scale: int
         used to calculate the spring layout for node positions
+    edge_density: bool
+        if True, the links are drawn as an image of their density, which is
+        faster and clearer for networks with very many links
 
     Returns
     -------
@@ -96,6 +101,10 @@ def visualize_on_network(network, node_values, coords_path,
         #coords = pickle.load(f, encoding='latin1')
         coords = pickle.load(f, encoding='latin1')
 
+    # The node and link coordinates are collected once for all the pictures
+    geometry = network_drawing.network_geometry(network, coords)
+    density = network_drawing.link_density(geometry) if edge_density else None
+
     fig = plt.figure(figsize=(12,5))
         
     # Loop over different value sets
@@ -106,8 +115,8 @@ def visualize_on_network(network, node_values, coords_path,
         # Draw the network figure
         
         ax = plt.subplot(gs[network_gs_index[0], network_gs_index[1]])
-        nx.draw(network, pos=coords, node_color=node_val, cmap=cmap,
-                node_size=node_size, font_size=font_size)
+        network_drawing.draw_network(ax, geometry, node_val, cmap=cmap,
+                                     node_size=node_size, edge_density=density)
 
         # Draw the colorbar (cb)
         cb_ax = plt.subplot(gs[cb_gs_index[0], cb_gs_index[1]])
@@ -129,35 +138,29 @@ def get_centrality_measures(network, tol):
     Parameters
     ----------
     network: networkx.Graph()
-    tol: tolerance parameter for calculating eigenvector centrality
+    tol: tolerance parameter for calculating eigenvector centrality, the
+        relative accuracy of the leading eigenvalue of the adjacency matrix
 
     Returns
     --------
     [degree, betweenness, closeness, eigenvector_centrality, kshell]: list of
     numpy.arrays
     """
-    nodes = network.node
+    nodes = list(network.nodes())
     N = len(nodes)
 
     degrees_temp = nx.degree(network)
-    betweenness_temp = nx.betweenness_centrality(network)
-    closeness_temp = nx.closeness_centrality(network)
-    eigenvector_centrality_temp = nx.eigenvector_centrality(network, tol=tol)
-    kshell_temp = nx.core_number(network)
+    # betweenness and closeness from one breadth-first search per node
+    traversal_measures = centrality.traversal_centralities(network)
+    eigenvector_centrality = centrality.eigenvector_centrality(network, tol=tol)
+    kshell = centrality.core_decomposition(network)[0].astype(float)
 
     degrees = np.zeros(N)
-    betweenness = np.zeros(N)
-    closeness = np.zeros(N)
-    eigenvector_centrality = np.zeros(N)
-    kshell = np.zeros(N)
-
+    betweenness = traversal_measures['betweenness']
+    closeness = traversal_measures['closeness']
 
     for i, node in enumerate(nodes):
         degrees[i] = degrees_temp[node]
-        betweenness[i] = betweenness_temp[node]
-        closeness[i] = closeness_temp[node]
-        eigenvector_centrality[i] = eigenvector_centrality_temp[node]
-        kshell[i] = kshell_temp[node]
     return [degrees, betweenness, closeness, eigenvector_centrality, kshell]
 
 
@@ -186,7 +189,7 @@ if __name__ == '__main__':
 
 
     fig_index = 0
-    tol = 10**-1 # tolerance parameter for calculating eigenvector centrality
+    tol = 10**-10 # tolerance parameter for calculating eigenvector centrality
 
     # Loop through all networks
     for (network_path, network_name, coords_path) in zip(network_paths, network_names, coords_paths):
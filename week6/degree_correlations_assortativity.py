@@ -11,11 +11,11 @@
 # write your own code. When you successfully modified the code in that part,
 # remove the `raise` command.
 from __future__ import print_function
+from multiprocessing import Pool
 import networkx as nx
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy.stats import binned_statistic_2d
-from scipy.stats import pearsonr
+import scipy.sparse as sp
 from colorbar_help import add_colorbar
 
 # ====================== FUNCTIONS USED BY THE MAIN CODE ===================
@@ -56,7 +56,8 @@ def create_scatter(x_degrees, y_degrees, network_title):
 
     return fig
 
-def create_heatmap(x_degrees, y_degrees, network_title):
+def create_heatmap(x_degrees, y_degrees, network_title, n_log_bins=None,
+                   matrix=None, bin_edges=None, max_degree_bins=200):
     """
     For x_degrees, y_degrees pair, creates and
     saves a heatmap of the degrees.
@@ -67,27 +68,49 @@ def create_heatmap(x_degrees, y_degrees, network_title):
     y_degrees: np.array
     network_title: str
         a network-referring title (string) for figures
+    n_log_bins: int, optional
+        if given, the degrees are binned into this many logarithmic bins
+        (see joint_degree_matrix), which keeps the heatmap small for
+        networks with heavy-tailed degree distributions. By default each
+        degree between the smallest and the largest one is a bin of its
+        own, unless they span more than max_degree_bins degrees, in which
+        case 30 logarithmic bins are used.
+    matrix: scipy.sparse.csr_matrix, optional
+    bin_edges: np.array, optional
+        a joint degree matrix computed earlier with n_log_bins, e.g. by
+        degree_correlations, so that it is not computed again. The heatmap
+        is a dense image of len(bin_edges)-1 squared cells.
+    max_degree_bins: int
+        see n_log_bins
 
     Returns
     -------
     no output, but heatmap figure (as pdf) is saved into the given path
     """
-    k_min = np.min((x_degrees, y_degrees))
-    k_max = np.max((x_degrees, y_degrees))
-
-    n_bins = k_max-k_min+1
-    values = np.zeros(x_degrees.size)
-
-    statistic = binned_statistic_2d(x_degrees,y_degrees, values,
-                                    statistic='count', bins=n_bins)[0]
+    if matrix is None:
+        k_min = min(np.min(x_degrees), np.min(y_degrees))
+        k_max = max(np.max(x_degrees), np.max(y_degrees))
+        if n_log_bins is None and k_max - k_min + 1 > max_degree_bins:
+            n_log_bins = 30
+        matrix, bin_edges = joint_degree_matrix(x_degrees, y_degrees, n_log_bins)
+
+    if n_log_bins is None:
+        # one bin per degree, starting from the smallest degree
+        k_min = int(min(np.min(x_degrees), np.min(y_degrees)))
+        matrix, bin_edges = matrix[k_min:, k_min:], bin_edges[k_min:]
+    statistic = matrix.toarray()
 
     fig = plt.figure(figsize=(6, 6))
     ax = fig.add_subplot(111)
-    ax.imshow(statistic, extent=(k_min-0.5, k_max+0.5, k_min-0.5, k_max+0.5),
-              origin='lower', cmap='hot', interpolation='nearest')
+    # rows of the matrix (start nodes) on the vertical axis
+    ax.pcolormesh(bin_edges, bin_edges, statistic, cmap='hot')
+    if n_log_bins is not None:
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+    ax.set_aspect('equal')
     ax.set_title(network_title)
-    ax.set_xlabel(r'Degree $k$')
-    ax.set_ylabel(r'Degree $k$')
+    ax.set_xlabel(r'Degree $k$ of the end node')
+    ax.set_ylabel(r'Degree $k$ of the start node')
     add_colorbar(statistic, cmap='hot')
     return fig
 
@@ -96,6 +119,27 @@ def create_heatmap(x_degrees, y_degrees, network_title):
 ######################################################
 
 
+def get_edge_arrays(network):
+    """
+    Returns the end points of the edges of the network as two arrays of node
+    indices. The nodes are indexed in the order of network.nodes().
+
+    Parameters
+    ----------
+    network: a NetworkX graph object
+
+    Returns
+    -------
+    sources: np.array of ints
+    targets: np.array of ints
+    n_nodes: int
+    """
+    node_index = {node: i for i, node in enumerate(network.nodes())}
+    edges = np.array([(node_index[u], node_index[v])
+                      for u, v in network.edges()], dtype=np.int64).reshape(-1, 2)
+    return edges[:, 0], edges[:, 1], len(node_index)
+
+
 def get_x_and_y_degrees(network):
     """
     For the given network, creates two arrays (x_degrees
@@ -111,21 +155,15 @@ def get_x_and_y_degrees(network):
     x_degrees: np.array
     y_degrees: np.array
     """
-    nodes = nx.nodes(network)
-    edges = network.edges()
-    N = len(edges)
-    
-    x_degrees = np.zeros(2 * N)
-    y_degrees = np.zeros(2 * N)
-
-    for i, edge in enumerate(edges):
-        x_degrees[i] = nx.degree(network, edge[0])
-        y_degrees[i] = nx.degree(network, edge[1])
-
-    for j in range(i, i+N):
-        x_degrees[j] = y_degrees[j-i]
-        y_degrees[j] = x_degrees[j-i]
-        
+    sources, targets, n_nodes = get_edge_arrays(network)
+    ends = np.concatenate((sources, targets))
+    # a self-loop adds two to the degree, as in nx.degree
+    degrees = np.bincount(ends, minlength=n_nodes)
+
+    if network.is_directed():
+        return degrees[sources], degrees[targets]
+    x_degrees = degrees[ends]
+    y_degrees = degrees[np.concatenate((targets, sources))]
     return x_degrees, y_degrees
 
 
@@ -142,19 +180,106 @@ def assortativity(x_degrees, y_degrees):
     Returns
     -------
     assortativity: float
-        the assortativity value of the network as a number
+        the assortativity value of the network as a number, nan if all
+        degrees are equal
+    """
+    x_deviations = np.asarray(x_degrees, dtype=float)
+    x_deviations = x_deviations - x_deviations.mean()
+    y_deviations = np.asarray(y_degrees, dtype=float)
+    y_deviations = y_deviations - y_deviations.mean()
+    norm = np.sqrt(np.dot(x_deviations, x_deviations) *
+                   np.dot(y_deviations, y_deviations))
+    if norm == 0:
+        return np.nan
+    return np.dot(x_deviations, y_deviations) / norm
+
+
+def joint_degree_matrix(x_degrees, y_degrees, n_log_bins=None):
     """
-    assortativity = pearsonr(x_degrees, y_degrees)[0]
-    return assortativity
+    Counts the edges between each pair of degrees (or degree bins) into a
+    sparse matrix, which only stores the degree pairs that occur.
 
-def get_nearest_neighbor_degree(network):
+    Parameters
+    ----------
+    x_degrees: np.array
+    y_degrees: np.array
+    n_log_bins: int, optional
+        if given, the degrees are binned into this many logarithmically
+        spaced bins between the smallest and the largest degree. By default
+        each degree is a bin of its own.
+
+    Returns
+    -------
+    matrix: scipy.sparse.csr_matrix
+        matrix[i, j] is the number of (x, y) pairs with x in bin i and y in
+        bin j. Without log binning bin i is degree i.
+    bin_edges: np.array
+        the len(matrix)+1 edges of the bins
+    """
+    x_degrees = np.asarray(x_degrees, dtype=np.int64)
+    y_degrees = np.asarray(y_degrees, dtype=np.int64)
+    k_max = max(x_degrees.max(), y_degrees.max())
+
+    if n_log_bins is None:
+        bin_edges = np.arange(k_max + 2) - 0.5
+        rows, cols = x_degrees, y_degrees
+    else:
+        k_min = max(min(x_degrees.min(), y_degrees.min()), 1)
+        bin_edges = np.logspace(np.log10(k_min), np.log10(k_max + 1),
+                                n_log_bins + 1)
+        bin_edges[[0, -1]] = k_min, k_max + 1
+        rows = np.searchsorted(bin_edges, x_degrees, side='right') - 1
+        cols = np.searchsorted(bin_edges, y_degrees, side='right') - 1
+
+    n_bins = len(bin_edges) - 1
+    matrix = sp.coo_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)),
+                           shape=(n_bins, n_bins)).tocsr()
+    return matrix, bin_edges
+
+
+def degree_correlations(network, n_log_bins=None):
+    """
+    Computes the edge degree correlations of the network in one go.
+
+    Parameters
+    ----------
+    network: a NetworkX graph object
+    n_log_bins: int, optional
+        see joint_degree_matrix
+
+    Returns
+    -------
+    correlations: dict with keys
+        'x_degrees', 'y_degrees': see get_x_and_y_degrees
+        'assortativity': see assortativity
+        'joint_degree_matrix', 'bin_edges': see joint_degree_matrix
+    """
+    x_degrees, y_degrees = get_x_and_y_degrees(network)
+    matrix, bin_edges = joint_degree_matrix(x_degrees, y_degrees, n_log_bins)
+    return {'x_degrees': x_degrees,
+            'y_degrees': y_degrees,
+            'assortativity': assortativity(x_degrees, y_degrees),
+            'joint_degree_matrix': matrix,
+            'bin_edges': bin_edges}
+
+def get_nearest_neighbor_degree(network, weight=None):
     """
     Calculates the average nearest neighbor degree for each node for the given
     list of networks.
 
+    The values of all nodes are obtained at once as A k / s, where A is the
+    adjacency matrix, k the degrees and s the row sums of A. With a weight,
+    A holds the link weights and s the strengths, which gives the weighted
+    average nearest neighbor degree of Barrat et al. For directed networks
+    the out-neighbors and out-degrees are used, as in
+    nx.average_neighbor_degree.
+
     Parameters
     ----------
     network: a NetworkX graph objects
+    weight: str, optional
+        edge attribute used as the link weight, by default all links have
+        weight one
 
     Returns
     -------
@@ -162,38 +287,29 @@ def get_nearest_neighbor_degree(network):
         an array of node degree
     nearest_neighbor_degrees: list-like
         an array of node average nearest neighbor degree in the same order
-        as degrees
-    """
-    nearest_neighbor_degrees = []
-    degrees_temp = dict(nx.degree(network))
-    minIndex1, minIndex2 = 10, 10
-    maxIndex1, maxIndex2 = 0, 0
-    nearest_neighbor_degrees_temp = nx.average_neighbor_degree(network)
-
-    for key in degrees_temp:
-        value = degrees_temp[key]
-        if int(key) < minIndex1:
-            minIndex1 = int(key)
-        if int(key) > maxIndex1:
-            maxIndex1 = int(key)
-    for key in nearest_neighbor_degrees_temp:
-        value = nearest_neighbor_degrees_temp[key]
-        if int(key) < minIndex2:
-            minIndex2 = int(key)
-        if int(key) > maxIndex2:
-            maxIndex2 = int(key)
-
-    degrees = np.zeros((maxIndex1-minIndex1 + 1,))
-    nearest_neighbor_degrees = np.zeros((maxIndex2-minIndex2 + 1,))
-    for key in degrees_temp:
-        value = degrees_temp[key]
-        degrees[int(key) - minIndex1] = value
-    for key in nearest_neighbor_degrees_temp:
-        value = nearest_neighbor_degrees_temp[key]
-        nearest_neighbor_degrees[int(key) - minIndex2] = value
+        as degrees (the order of network.nodes()), 0 for isolated nodes
+    """
+    sources, targets, n_nodes = get_edge_arrays(network)
+    if weight is None:
+        weights = np.ones(len(sources))
+    else:
+        weights = np.array([w for _, _, w in
+                            network.edges(data=weight, default=1)], dtype=float)
+    if not network.is_directed():
+        sources, targets = (np.concatenate((sources, targets)),
+                            np.concatenate((targets, sources)))
+        weights = np.concatenate((weights, weights))
+
+    adjacency = sp.csr_matrix((weights, (sources, targets)),
+                              shape=(n_nodes, n_nodes))
+    degrees = np.bincount(sources, minlength=n_nodes)
+    strengths = np.asarray(adjacency.sum(axis=1)).ravel()
+    nearest_neighbor_degrees = np.zeros(n_nodes)
+    np.divide(adjacency.dot(degrees), strengths, out=nearest_neighbor_degrees,
+              where=strengths != 0)
     return degrees, nearest_neighbor_degrees
 
-def get_simple_bin_average(x_values, y_values):
+def get_simple_bin_average(x_values, y_values, weights=None):
     """
     Calculates average of y values within each x bin. The binning used is the
     most simple one: each unique x value is a bin of it's own.
@@ -202,28 +318,223 @@ def get_simple_bin_average(x_values, y_values):
     ----------
     x_values: an array of x values
     y_values: an array of corresponding y values
+    weights: an array of weights of the values, optional, e.g. the node
+        strengths; by default all values have the same weight
 
     Returns
     -------
     bins: an array of unique x values
     bin_average: an array of average y values per each unique x
     """
-    bins = x_values
-    for i in bins:
-        for j in bins:
-            if i == j:
-                bins = np.delete(bins,j)
-
-    bin_average = np.zeros(len(bins)) # replace
-    for i in range(len(bins)):
-        denominator = 0
-        for k in y_values:
-            if k == bins[i]:
-                bin_average[i] = bin_average[i] + k
-                denominator = denominator + 1
-        bin_average[i] = bin_average[i]/denominator
+    bins, bin_indices = np.unique(x_values, return_inverse=True)
+    if weights is None:
+        weights = np.ones(len(bin_indices))
+    weights = np.asarray(weights, dtype=float)
+    bin_average = (np.bincount(bin_indices, weights=weights * y_values) /
+                   np.bincount(bin_indices, weights=weights))
     return bins, bin_average
 
+def _edge_keys(sources, targets, n_nodes):
+    """
+    Returns an integer key for each undirected link, the same for (u, v)
+    and (v, u).
+    """
+    return np.minimum(sources, targets) * n_nodes + np.maximum(sources, targets)
+
+def _contains(sorted_keys, keys):
+    """
+    Returns a boolean array telling which of keys are in sorted_keys.
+    """
+    if len(sorted_keys) == 0:
+        return np.zeros(len(keys), dtype=bool)
+    positions = np.searchsorted(sorted_keys, keys)
+    positions[positions == len(sorted_keys)] = 0
+    return sorted_keys[positions] == keys
+
+def randomize_edges(sources, targets, n_nodes, n_swaps, rng):
+    """
+    Randomizes an undirected network without self-loops or multiple links
+    with double edge swaps, which keep the degree of every node.
+
+    The swaps are done in rounds: the links are paired at random and each
+    pair (a, b), (c, d) is proposed to be rewired to (a, d), (c, b) or to
+    (a, c), (d, b). A swap is rejected if it would create a self-loop or a
+    link that exists, or a link that another pair also proposes, or if
+    another pair proposes to create one of its own links. These conditions
+    only depend on the links outside the pairs and on the old and new
+    links of all pairs, which are the same before and after the round, so
+    each round can be undone with the same probability. A rejected swap
+    leaves its links as they are but still counts as a step, as in the
+    usual one-swap-at-a-time chain; counting only the successful swaps
+    would make the chain stay longer in networks where swaps succeed less
+    often and bias the sample. The checks are done on sorted integer keys
+    of the links.
+
+    Parameters
+    ----------
+    sources: np.array of ints
+    targets: np.array of ints
+        the end points of the links, see get_edge_arrays
+    n_nodes: int
+    n_swaps: int
+        number of attempted swaps
+    rng: np.random.Generator
+
+    Returns
+    -------
+    sources: np.array of ints
+    targets: np.array of ints
+        the end points of the links of the randomized network
+    """
+    sources = np.array(sources, dtype=np.int64)
+    targets = np.array(targets, dtype=np.int64)
+    n_edges = len(sources)
+    keys = np.sort(_edge_keys(sources, targets, n_nodes))
+    n_tried = 0
+    while n_tried < n_swaps and n_edges > 1:
+        n_pairs = min(n_edges // 2, n_swaps - n_tried)
+        order = rng.permutation(n_edges)
+        first, second = order[:n_pairs], order[n_pairs:2 * n_pairs]
+        a, b = sources[first], targets[first]
+        c, d = sources[second], targets[second]
+        flip = rng.random(n_pairs) < 0.5
+        c, d = np.where(flip, d, c), np.where(flip, c, d)
+
+        new_first = _edge_keys(a, d, n_nodes)
+        new_second = _edge_keys(c, b, n_nodes)
+        new_keys, counts = np.unique(np.concatenate((new_first, new_second)),
+                                     return_counts=True)
+        repeated = new_keys[counts > 1]
+        valid = ((a != d) & (c != b) &
+                 ~_contains(keys, new_first) & ~_contains(keys, new_second) &
+                 ~_contains(repeated, new_first) & ~_contains(repeated, new_second) &
+                 ~_contains(new_keys, _edge_keys(a, b, n_nodes)) &
+                 ~_contains(new_keys, _edge_keys(c, d, n_nodes)))
+
+        targets[first[valid]] = d[valid]
+        sources[second[valid]] = c[valid]
+        targets[second[valid]] = b[valid]
+        keys = np.sort(_edge_keys(sources, targets, n_nodes))
+        n_tried += n_pairs
+    return sources, targets
+
+def edge_array_statistics(sources, targets, n_nodes):
+    """
+    Calculates the assortativity and the average nearest neighbor degree
+    per degree of an undirected network given as edge arrays.
+
+    Parameters
+    ----------
+    sources: np.array of ints
+    targets: np.array of ints
+    n_nodes: int
+
+    Returns
+    -------
+    assortativity: float
+    bins: np.array of the unique degrees of the nodes that have links
+    bin_average: np.array of the mean nearest neighbor degree per degree
+    """
+    degrees = np.bincount(np.concatenate((sources, targets)), minlength=n_nodes)
+    r = assortativity(degrees[np.concatenate((sources, targets))],
+                      degrees[np.concatenate((targets, sources))])
+    neighbor_degree_sums = (
+        np.bincount(sources, weights=degrees[targets], minlength=n_nodes) +
+        np.bincount(targets, weights=degrees[sources], minlength=n_nodes))
+    linked = degrees > 0
+    bins, bin_average = get_simple_bin_average(
+        degrees[linked], neighbor_degree_sums[linked] / degrees[linked])
+    return r, bins, bin_average
+
+_null_model_state = {}
+
+def _init_null_model_worker(sources, targets, n_nodes, n_swaps):
+    _null_model_state.update(sources=sources, targets=targets,
+                             n_nodes=n_nodes, n_swaps=n_swaps)
+
+def _randomized_statistics(seed):
+    """
+    Randomizes the network given to _init_null_model_worker once and returns
+    its assortativity and average nearest neighbor degrees.
+    """
+    state = _null_model_state
+    sources, targets = randomize_edges(state['sources'], state['targets'],
+                                       state['n_nodes'], state['n_swaps'],
+                                       np.random.default_rng(seed))
+    r, _, bin_average = edge_array_statistics(sources, targets,
+                                              state['n_nodes'])
+    return r, bin_average
+
+def degree_preserving_null_model(network, n_realizations=100,
+                                 n_swaps_per_edge=10, n_workers=None,
+                                 seed=None):
+    """
+    Compares the assortativity and the average nearest neighbor degrees of
+    the network to an ensemble of randomized networks with the same degree
+    sequence (see randomize_edges), generated in parallel. Self-loops are
+    left out.
+
+    Parameters
+    ----------
+    network: a NetworkX graph object, undirected
+    n_realizations: int
+        number of randomized networks
+    n_swaps_per_edge: int
+        number of attempted double edge swaps per link in each randomized
+        network
+    n_workers: int, optional
+        number of worker processes, defaults to the number of CPUs; with 1
+        the networks are randomized in this process
+    seed: int, optional
+
+    Returns
+    -------
+    null_model: dict with keys
+        'assortativity': the assortativity of the network
+        'null_assortativity': np.array of the assortativities of the
+            randomized networks
+        'assortativity_z': z-score of the assortativity
+        'degrees': np.array of the unique degrees
+        'nearest_neighbor_degree': np.array of the mean nearest neighbor
+            degree per degree in the network
+        'null_nearest_neighbor_degree': np.array of shape
+            (n_realizations, len(degrees)), the same in the randomized
+            networks
+        'nearest_neighbor_degree_z': np.array of z-scores per degree, nan
+            where the randomized networks do not vary
+    """
+    sources, targets, n_nodes = get_edge_arrays(network)
+    loops = sources == targets
+    sources, targets = sources[~loops], targets[~loops]
+    n_swaps = n_swaps_per_edge * len(sources)
+    r, bins, bin_average = edge_array_statistics(sources, targets, n_nodes)
+
+    seeds = np.random.SeedSequence(seed).spawn(n_realizations)
+    initargs = (sources, targets, n_nodes, n_swaps)
+    if n_workers == 1:
+        _init_null_model_worker(*initargs)
+        results = [_randomized_statistics(s) for s in seeds]
+    else:
+        with Pool(n_workers, initializer=_init_null_model_worker,
+                  initargs=initargs) as pool:
+            results = list(pool.imap(_randomized_statistics, seeds))
+    null_r = np.array([result[0] for result in results])
+    null_bin_average = np.array([result[1] for result in results])
+
+    def z_score(value, null_values):
+        std = null_values.std(axis=0)
+        z = np.full(np.shape(std), np.nan)
+        np.divide(value - null_values.mean(axis=0), std, out=z, where=std > 0)
+        return z
+
+    return {'assortativity': r,
+            'null_assortativity': null_r,
+            'assortativity_z': float(z_score(r, null_r)),
+            'degrees': bins,
+            'nearest_neighbor_degree': bin_average,
+            'null_nearest_neighbor_degree': null_bin_average,
+            'nearest_neighbor_degree_z': z_score(bin_average, null_bin_average)}
+
 ###############################################################
 # Code that is given to you, and does not need to be modified #
 ###############################################################
@@ -274,35 +585,49 @@ def visualize_nearest_neighbor_degree(degrees, nearest_neighbor_degrees, bins, b
 
 if __name__ == '__main__':
     # YOUR CODE HERE
-    #TODO: set network paths and names properly
     # see documentation of the functions where these variables are used
     # for the details of these variables
-    network_paths = ['', ''] # replace, example path: '../data/karate_club_network_edge_file.edg'
-    network_names = ['', ''] # replace, these are extensions added to figure file names
-    network_titles = ['', ''] # replace, used in figure titles
+    network_paths = ['./data/karate_club_network_edge_file.edg',
+                     './data/facebook-wosn-links_subgraph.edg']
+    network_names = ['karate', 'facebook']
+    network_titles = ['Karate club network', 'Facebook friendship network']
+    # logarithmic degree bins for the heatmaps, None for one bin per degree
+    heatmap_log_bins = [None, 30]
     # network_name and .pdf extension are added after figure_base variables when saving the figures
-    scatter_figure_base = '' # replace, where to save the scatterplots, example: '../figs/edge_degree_correlation_scatter_' which contains path (../figs/) and beginning of file name (edge_degree...)
-    heatmap_figure_base = '' # replace, where to save the heatmaps
-    nearest_neighbor_figure_base = '' # replace, where to save nearest neighbor figures
+    scatter_figure_base = './edge_degree_correlation_scatter_'
+    heatmap_figure_base = './edge_degree_correlation_heatmap_'
+    nearest_neighbor_figure_base = './nearest_neighbor_degree_'
     # Loop through all networks
-    for network_path, network_name, network_title in zip(network_paths, network_names, network_titles):
+    for network_path, network_name, network_title, n_log_bins in zip(
+            network_paths, network_names, network_titles, heatmap_log_bins):
         network = nx.read_weighted_edgelist(network_path)
-        x_degrees, y_degrees = get_x_and_y_degrees(network)
+        correlations = degree_correlations(network, n_log_bins)
+        x_degrees = correlations['x_degrees']
+        y_degrees = correlations['y_degrees']
 
         fig = create_scatter(x_degrees, y_degrees, network_title)
         fig.savefig(scatter_figure_base+network_name+'.pdf')
 
-        fig = create_heatmap(x_degrees, y_degrees, network_title)
+        fig = create_heatmap(x_degrees, y_degrees, network_title, n_log_bins,
+                             correlations['joint_degree_matrix'],
+                             correlations['bin_edges'])
         fig.savefig(heatmap_figure_base+network_name+'.pdf')
 
         # assortativities
-        assortativity_own = assortativity(x_degrees, y_degrees)
+        assortativity_own = correlations['assortativity']
         assortativity_nx = nx.degree_assortativity_coefficient(network)
         print("Own assortativity for " + network_title + ": " +
               str(assortativity_own))
         print("NetworkX assortativity for " + network_title + ": " +
               str(assortativity_nx))
 
+        # significance against randomized networks with the same degrees
+        null_model = degree_preserving_null_model(network, n_realizations=100)
+        print("Assortativity of randomized networks: " +
+              str(np.mean(null_model['null_assortativity'])) + " +- " +
+              str(np.std(null_model['null_assortativity'])) + ", z-score " +
+              str(null_model['assortativity_z']))
+
         # nearest neighbor degrees
         degrees, nearest_neighbor_degrees = get_nearest_neighbor_degree(network)
         unique_degrees, mean_nearest_neighbor_degrees = get_simple_bin_average(degrees,
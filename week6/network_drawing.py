@@ -0,0 +1,150 @@
+"""
+Fast drawing of large networks with matplotlib.
+
+nx.draw creates the node and link artists from the graph on every call. Here
+the node coordinates and the end points of the links are collected into
+arrays once (network_geometry), and each panel is drawn from them with one
+LineCollection of the links and one scatter of the nodes, so that drawing
+the same network with other node values only changes the color array.
+
+For networks with so many links that the lines merge into a blur, the links
+can instead be drawn as an image of their density (link_density), which is
+computed once and costs the same to show however many links there are.
+
+The same module is kept in week5 and week6, because the scripts and
+notebooks of each week are run from their own directory and only import
+helpers next to them (like utils.py and colorbar_help.py). Changes should be
+made to both copies.
+
+Usage:
+
+geometry = network_geometry(network, coords)
+density = link_density(geometry)  # optional, for large networks
+for ax, values in zip(axes, node_values):
+    draw_network(ax, geometry, values, edge_density=density)
+"""
+import matplotlib as mpl
+import numpy as np
+from matplotlib.collections import LineCollection
+
+
+def network_geometry(network, node_positions):
+    """
+    Collects the coordinates of the nodes and links of the network into
+    arrays.
+
+    Parameters
+    ----------
+    network : networkx graph
+    node_positions : dict mapping each node to its (x, y) coordinates, e.g.
+      from nx.spring_layout
+
+    Returns
+    -------
+    geometry : dict with keys
+      'nodes' : list of nodes in the order of the coordinates
+      'xy' : np.array of shape (n_nodes, 2), the node coordinates
+      'segments' : np.array of shape (n_links, 2, 2), the coordinates of the
+        end points of each link
+    """
+    nodes = list(network.nodes())
+    node_index = {node: i for i, node in enumerate(nodes)}
+    xy = np.array([node_positions[node] for node in nodes],
+                  dtype=float).reshape(-1, 2)
+    links = np.array([(node_index[u], node_index[v])
+                      for u, v in network.edges()], dtype=np.int64).reshape(-1, 2)
+    return {'nodes': nodes, 'xy': xy, 'segments': xy[links]}
+
+
+def link_density(geometry, bins=512, samples_per_link=16, chunk_size=10**5):
+    """
+    Rasterizes the links into a 2D histogram of points sampled evenly along
+    them, weighted so that each link adds ink in proportion to its length.
+
+    Parameters
+    ----------
+    geometry : dict, see network_geometry
+    bins : number of pixels along each axis
+    samples_per_link : number of points sampled along each link
+    chunk_size : number of links sampled at a time, to limit the memory use
+
+    Returns
+    -------
+    density : dict with keys
+      'image' : np.array of shape (bins, bins), indexed [x, y]
+      'extent' : (x_min, x_max, y_min, y_max) of the image
+    """
+    xy = geometry['xy']
+    segments = geometry['segments']
+    x_min, y_min = xy.min(axis=0)
+    x_max, y_max = xy.max(axis=0)
+    ranges = [[x_min, x_max if x_max > x_min else x_min + 1],
+              [y_min, y_max if y_max > y_min else y_min + 1]]
+    image = np.zeros((bins, bins))
+    t = (np.arange(samples_per_link) + 0.5) / samples_per_link
+    for start in range(0, len(segments), chunk_size):
+        chunk = segments[start:start + chunk_size]
+        directions = chunk[:, 1] - chunk[:, 0]
+        points = chunk[:, None, 0] + t[None, :, None] * directions[:, None]
+        weights = np.repeat(np.hypot(directions[:, 0], directions[:, 1]) /
+                            samples_per_link, samples_per_link)
+        image += np.histogram2d(points[..., 0].ravel(), points[..., 1].ravel(),
+                                bins=bins, range=ranges, weights=weights)[0]
+    return {'image': image,
+            'extent': (ranges[0][0], ranges[0][1], ranges[1][0], ranges[1][1])}
+
+
+def draw_network(ax, geometry, node_colors=None, cmap='YlOrRd', node_size=50,
+                 edge_density=None, edge_color='k', edge_width=1.0,
+                 vmin=None, vmax=None, rasterized=False, draw_links=True):
+    """
+    Draws the network on the axes from its precomputed geometry.
+
+    Parameters
+    ----------
+    ax : matplotlib axes
+    geometry : dict, see network_geometry
+    node_colors : list-like of node values in the order of geometry['nodes'],
+      mapped to colors with cmap; by default all nodes have the same color
+    cmap : matplotlib colormap name
+    node_size : size of the nodes in points squared, as in nx.draw
+    edge_density : dict, optional, see link_density; if given, the links are
+      shown as this image instead of lines
+    edge_color : color of the links drawn as lines
+    edge_width : width of the links drawn as lines
+    vmin, vmax : range of the color scale, by default the range of the
+      node values
+    rasterized : if True, the lines and nodes are stored as an image in
+      vector formats such as pdf, which keeps the files small
+    draw_links : if False, only the nodes are drawn, e.g. when the links are
+      drawn as arrows with nx.draw_networkx_edges
+
+    Returns
+    -------
+    nodes : the PathCollection of the nodes; the node values can be changed
+      later with nodes.set_array(values)
+    """
+    if draw_links:
+        if edge_density is None:
+            links = LineCollection(geometry['segments'], colors=edge_color,
+                                   linewidths=edge_width, zorder=1,
+                                   rasterized=rasterized)
+            ax.add_collection(links)
+        else:
+            ax.imshow(edge_density['image'].T, extent=edge_density['extent'],
+                      origin='lower', cmap='Greys', aspect='auto',
+                      interpolation='nearest', zorder=0,
+                      norm=mpl.colors.PowerNorm(0.5))
+
+    xy = geometry['xy']
+    if node_colors is None:
+        nodes = ax.scatter(xy[:, 0], xy[:, 1], s=node_size, c='#1f78b4',
+                           zorder=2, rasterized=rasterized)
+    else:
+        nodes = ax.scatter(xy[:, 0], xy[:, 1], s=node_size,
+                           c=np.asarray(node_colors, dtype=float), cmap=cmap,
+                           vmin=vmin, vmax=vmax, zorder=2,
+                           rasterized=rasterized)
+    ax.autoscale_view()
+    ax.set_axis_off()
+    return nodes
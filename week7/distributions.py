@@ -0,0 +1,259 @@
+"""
+Complementary cumulative distributions (1-CDFs) of large data vectors.
+
+ccdf computes the exact 1-CDF by sorting the data once and counting the
+repeated values with np.unique, in O(N log N) time.
+
+For data that does not fit in memory, a quantile sketch keeps counts of the
+values in logarithmic buckets [gamma**(i-1), gamma**i) with
+gamma = (1 + alpha) / (1 - alpha). Every value is represented by the middle
+of its bucket, which is within a relative error alpha of the true value, so
+the quantiles and the 1-CDF read off the sketch are accurate to alpha
+whatever the number of values. The memory use only depends on the range of
+the values, not on their number. Sketches of separate chunks (e.g. computed
+in parallel) can be merged by adding their counts.
+
+Usage:
+
+values, ccdf_values = ccdf(data)
+
+sketch = quantile_sketch(relative_accuracy=0.01)
+for chunk in edge_weight_chunks('links.edg'):
+    sketch_update(sketch, chunk)
+values, ccdf_values = sketch_ccdf(sketch)
+"""
+import itertools
+
+import numpy as np
+
+
+def ccdf(data):
+    """
+    Computes the exact 1-CDF, P(X >= x), of the data by sorting it once.
+
+    Parameters
+    ----------
+    data : iterable of numbers
+
+    Returns
+    -------
+    values : np.array, the distinct values in increasing order
+    ccdf : np.array, the fraction of the data that is >= each value
+    """
+    values, counts = np.unique(np.asarray(data, dtype=float).ravel(),
+                               return_counts=True)
+    return values, _counts_to_ccdf(counts)
+
+
+def _counts_to_ccdf(counts):
+    """
+    Converts the counts of increasing values to the fraction of the data that
+    is larger than or equal to each value.
+    """
+    n = counts.sum()
+    if n == 0:
+        return np.zeros(0)
+    return (n - np.cumsum(counts) + counts) / float(n)
+
+
+def quantile_sketch(relative_accuracy=0.01):
+    """
+    Creates an empty quantile sketch of non-negative values.
+
+    Parameters
+    ----------
+    relative_accuracy : float between 0 and 1, the largest relative error of
+      the values read off the sketch
+
+    Returns
+    -------
+    sketch : dict with keys
+      'relative_accuracy', 'gamma' : the accuracy and the ratio of the bucket
+        edges
+      'offset' : int, the index of the first bucket in counts
+      'counts' : np.array of ints, the number of values in each bucket
+      'zero_count' : the number of values equal to zero
+      'n', 'min', 'max' : the number and range of the values
+    """
+    if not 0 < relative_accuracy < 1:
+        raise ValueError('relative_accuracy must be between 0 and 1')
+    return {'relative_accuracy': relative_accuracy,
+            'gamma': (1 + relative_accuracy) / (1 - relative_accuracy),
+            'offset': 0,
+            'counts': np.zeros(0, dtype=np.int64),
+            'zero_count': 0,
+            'n': 0,
+            'min': np.inf,
+            'max': -np.inf}
+
+
+def _add_bucket_counts(sketch, offset, counts):
+    """
+    Adds counts of the buckets offset, offset + 1, ... to the sketch in place.
+    """
+    if len(counts) == 0:
+        return
+    old_offset, old_counts = sketch['offset'], sketch['counts']
+    if len(old_counts) == 0:
+        sketch['offset'], sketch['counts'] = offset, counts.astype(np.int64)
+        return
+    start = min(old_offset, offset)
+    end = max(old_offset + len(old_counts), offset + len(counts))
+    merged = np.zeros(end - start, dtype=np.int64)
+    merged[old_offset - start:old_offset - start + len(old_counts)] += old_counts
+    merged[offset - start:offset - start + len(counts)] += counts
+    sketch['offset'], sketch['counts'] = start, merged
+
+
+def sketch_update(sketch, data):
+    """
+    Adds the data to the sketch in place.
+
+    Parameters
+    ----------
+    sketch : dict, see quantile_sketch
+    data : iterable of non-negative numbers
+
+    Returns
+    -------
+    sketch : the same dict, for convenience
+    """
+    data = np.asarray(data, dtype=float).ravel()
+    if len(data) == 0:
+        return sketch
+    if not np.all(data >= 0):
+        raise ValueError('the sketch only takes non-negative values')
+    positive = data[data > 0]
+    sketch['zero_count'] += len(data) - len(positive)
+    if len(positive):
+        keys = np.ceil(np.log(positive) / np.log(sketch['gamma'])).astype(np.int64)
+        first = keys.min()
+        _add_bucket_counts(sketch, first, np.bincount(keys - first))
+    sketch['n'] += len(data)
+    sketch['min'] = min(sketch['min'], data.min())
+    sketch['max'] = max(sketch['max'], data.max())
+    return sketch
+
+
+def sketch_merge(sketch, other):
+    """
+    Merges two sketches with the same relative accuracy, e.g. of two chunks
+    of the data. The result is the same as a sketch of all the data.
+
+    Parameters
+    ----------
+    sketch, other : dicts, see quantile_sketch
+
+    Returns
+    -------
+    merged : a new sketch
+    """
+    if sketch['gamma'] != other['gamma']:
+        raise ValueError('only sketches with the same relative accuracy can '
+                         'be merged')
+    merged = dict(sketch, counts=sketch['counts'].copy())
+    _add_bucket_counts(merged, other['offset'], other['counts'])
+    merged['zero_count'] += other['zero_count']
+    merged['n'] += other['n']
+    merged['min'] = min(sketch['min'], other['min'])
+    merged['max'] = max(sketch['max'], other['max'])
+    return merged
+
+
+def sketch_from_chunks(chunks, relative_accuracy=0.01):
+    """
+    Builds a sketch of data that is streamed in chunks.
+
+    Parameters
+    ----------
+    chunks : iterable of arrays of non-negative numbers, e.g. from
+      edge_weight_chunks
+    relative_accuracy : float, see quantile_sketch
+
+    Returns
+    -------
+    sketch : dict, see quantile_sketch
+    """
+    sketch = quantile_sketch(relative_accuracy)
+    for chunk in chunks:
+        sketch_update(sketch, chunk)
+    return sketch
+
+
+def _sketch_values_and_counts(sketch):
+    """
+    Returns the representative values and counts of the non-empty buckets
+    of the sketch in increasing order, starting with the zeros.
+    """
+    gamma = sketch['gamma']
+    nonzero = np.flatnonzero(sketch['counts'])
+    values = 2 * gamma**(sketch['offset'] + nonzero) / (gamma + 1)
+    values = np.clip(values, sketch['min'], sketch['max'])
+    counts = sketch['counts'][nonzero]
+    if sketch['zero_count']:
+        values = np.concatenate([[0.], values])
+        counts = np.concatenate([[sketch['zero_count']], counts])
+    return values, counts
+
+
+def sketch_quantile(sketch, q):
+    """
+    Reads quantiles off the sketch.
+
+    Parameters
+    ----------
+    sketch : dict, see quantile_sketch
+    q : float or array of floats between 0 and 1
+
+    Returns
+    -------
+    quantiles : float or np.array, within the relative accuracy of the
+      sketch from the exact quantiles (of the lower order statistic)
+    """
+    if sketch['n'] == 0:
+        raise ValueError('the sketch is empty')
+    values, counts = _sketch_values_and_counts(sketch)
+    ranks = np.asarray(q, dtype=float) * (sketch['n'] - 1)
+    return values[np.searchsorted(np.cumsum(counts), ranks, side='right')]
+
+
+def sketch_ccdf(sketch):
+    """
+    Reads the 1-CDF off the sketch.
+
+    Parameters
+    ----------
+    sketch : dict, see quantile_sketch
+
+    Returns
+    -------
+    values : np.array, the representative value of each non-empty bucket
+    ccdf : np.array, the fraction of the data in that bucket or above it,
+      i.e. the 1-CDF at values within the relative accuracy of the sketch
+    """
+    values, counts = _sketch_values_and_counts(sketch)
+    return values, _counts_to_ccdf(counts)
+
+
+def edge_weight_chunks(path, chunk_size=10**6, column=2):
+    """
+    Reads the link weights of an edge list file in chunks, so that files
+    larger than the memory can be sketched.
+
+    Parameters
+    ----------
+    path : path to a whitespace separated edge list with lines
+      "node node weight"
+    chunk_size : number of lines read at a time
+    column : index of the weight column
+
+    Yields
+    ------
+    weights : np.array of at most chunk_size floats
+    """
+    with open(path) as f:
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                return
+            yield np.loadtxt(lines, usecols=column, ndmin=1)
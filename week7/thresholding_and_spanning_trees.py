@@ -61,6 +61,151 @@ def plot_network_usa(net, xycoords, bg_figname, edges=None, alpha=0.3):
 # Starting from here you might need to edit the code #
 ######################################################
 
+def get_edge_arrays(net, weight='weight'):
+    """
+    Converts the links of the network into index arrays, aligned with the
+    link order of list(net.edges()).
+
+    Parameters
+    ----------
+    net : networkx.Graph
+    weight : name of the link attribute holding the weight
+
+    Returns
+    -------
+    sources, targets : np.arrays of ints, the node indices of the links
+    weights : np.array of floats
+    nodes : list of nodes, nodes[i] is the node with index i
+    """
+    nodes = list(net.nodes())
+    node_index = {node: i for i, node in enumerate(nodes)}
+    n_edges = net.number_of_edges()
+    sources = np.empty(n_edges, dtype=np.int64)
+    targets = np.empty(n_edges, dtype=np.int64)
+    weights = np.empty(n_edges)
+    for e, (u, v, w) in enumerate(net.edges(data=weight, default=1.0)):
+        sources[e] = node_index[u]
+        targets[e] = node_index[v]
+        weights[e] = w
+    return sources, targets, weights, nodes
+
+def find_root(parent, i):
+    """
+    Finds the root of the set of element i in a union-find forest, and
+    compresses the path so that all elements on it point to the root.
+
+    Parameters
+    ----------
+    parent : list of ints, parent[i] is the parent of element i
+    i : int
+
+    Returns
+    -------
+    root : int
+    """
+    root = i
+    while parent[root] != root:
+        root = parent[root]
+    while parent[i] != root:
+        parent[i], i = root, parent[i]
+    return root
+
+def union(parent, size, i, j):
+    """
+    Merges the sets containing elements i and j of a union-find forest,
+    attaching the smaller set below the root of the larger one. This is the
+    same union-find as week4/code/union_find.py (there with path halving),
+    kept here so that the scripts of this week run on their own.
+
+    Parameters
+    ----------
+    parent : list of ints, parent[i] is the parent of element i
+    size : list of ints, size[r] is the size of the set whose root is r
+    i, j : int
+
+    Returns
+    -------
+    merged_size : int, size of the merged set, or 0 if i and j were already
+      in the same set
+    """
+    root_i = find_root(parent, i)
+    root_j = find_root(parent, j)
+    if root_i == root_j:
+        return 0
+    if size[root_i] < size[root_j]:
+        root_i, root_j = root_j, root_i
+    parent[root_j] = root_i
+    size[root_i] += size[root_j]
+    return size[root_i]
+
+def kruskal_mask(sources, targets, weights, n_nodes, maximum=False):
+    """
+    Finds a minimum (or maximum) spanning forest with Kruskal's algorithm:
+    the links are sorted by weight once, and each link is taken if its
+    end points are not yet connected, as tracked with a union-find forest.
+
+    Parameters
+    ----------
+    sources, targets : np.arrays of ints, the node indices of the links
+    weights : np.array of floats
+    n_nodes : int
+    maximum : if True, the maximum spanning forest is found
+
+    Returns
+    -------
+    mask : boolean np.array, True for the links in the spanning forest
+    """
+    order = np.argsort(-weights if maximum else weights, kind='stable')
+    parent = list(range(n_nodes))
+    size = [1] * n_nodes
+    mask = np.zeros(len(weights), dtype=bool)
+    n_taken = 0
+    for e, u, v in zip(order.tolist(), sources[order].tolist(),
+                       targets[order].tolist()):
+        if not union(parent, size, u, v):
+            continue
+        mask[e] = True
+        n_taken += 1
+        if n_taken == n_nodes - 1:
+            break
+    return mask
+
+def spanning_tree_mask(net, maximum=False, weight='weight'):
+    """
+    Finds a minimum (or maximum) spanning tree of the network.
+
+    Parameters
+    ----------
+    net : networkx.Graph
+    maximum : if True, the maximum spanning tree is found
+    weight : name of the link attribute holding the weight
+
+    Returns
+    -------
+    mask : boolean np.array aligned with list(net.edges()), True for the
+      links in the spanning tree
+    """
+    sources, targets, weights, nodes = get_edge_arrays(net, weight)
+    return kruskal_mask(sources, targets, weights, len(nodes), maximum)
+
+def strongest_links_mask(weights, k):
+    """
+    Finds the k links with the largest weights (ties broken by link order).
+
+    Parameters
+    ----------
+    weights : np.array of floats
+    k : int
+
+    Returns
+    -------
+    mask : boolean np.array, True for the k strongest links
+    """
+    mask = np.zeros(len(weights), dtype=bool)
+    mask[np.argsort(-weights, kind='stable')[:k]] = True
+    return mask
+
+
 
 # =========================== MAIN CODE BELOW ==============================
 
@@ -80,32 +225,36 @@ if __name__ == '__main__':
     print(f'Diameter: {nx.diameter(net)}')
     print(f'Avg. clustering: {nx.average_clustering(net)}')
     fig = plot_network_usa(net, xycoords, bg_figname)
-    min_st = list(nx.minimum_spanning_edges(net))
+
+    # The spanning trees and the strongest links are boolean masks over
+    # the links in the order of list(net.edges())
+    edges = list(net.edges())
+    sources, targets, weights, nodes = get_edge_arrays(net)
+    min_st_mask = kruskal_mask(sources, targets, weights, len(nodes))
+    min_st = [edges[e] for e in np.flatnonzero(min_st_mask)]
     fig1 = plot_network_usa(net, xycoords, bg_figname, min_st)
     plt.suptitle("Minimal spanning tree", size=20)
 
-    max_st = list(nx.maximum_spanning_edges(net))
+    max_st_mask = kruskal_mask(sources, targets, weights, len(nodes),
+                               maximum=True)
+    max_st = [edges[e] for e in np.flatnonzero(max_st_mask)]
     fig2 = plot_network_usa(net, xycoords, bg_figname, max_st)
-    plt.suptitle("Maximal spanning tree", size=20)    
-    
-    temp_net = net.copy()
-    for (u,v,d) in temp_net.edges(data=True):
-        d['weight']=-d['weight']#edge['weight']
-    edges2 = list(nx.minimum_spanning_edges(temp_net))
-    max_st2 = list(nx.maximum_spanning_edges(net))
+    plt.suptitle("Maximal spanning tree", size=20)
+
+    # The minimal spanning tree of the negated weights is the maximal one
+    max_st_mask2 = kruskal_mask(sources, targets, -weights, len(nodes))
+    max_st2 = [edges[e] for e in np.flatnonzero(max_st_mask2)]
     fig2 = plot_network_usa(net, xycoords, bg_figname, max_st2)
     plt.suptitle("Maximal spanning tree by negating the weights", size=20)
-    
+    print(f'Same links as the maximal spanning tree: '
+          f'{np.array_equal(max_st_mask, max_st_mask2)}')
+
      # for maximal
     max_m = len(max_st)
-    edges_max_st = sorted(net.edges(data=True), key=lambda x: x[2]['weight'], reverse=True)
-    plot_network_usa(net, xycoords, bg_figname, edges_max_st[:max_m])
+    strongest_mask = strongest_links_mask(weights, max_m)
+    strongest = [edges[e] for e in np.flatnonzero(strongest_mask)]
+    plot_network_usa(net, xycoords, bg_figname, strongest)
     plt.suptitle(f'Strongest {max_m} links (maximal spanning tree)', size=20)
-    
-    count = 0
-    for e1 in edges_max_st:
-        for e2 in max_st:
-            if e1 == e2:
-                count+=1
-
-    print(f'count: {count}')
\ No newline at end of file
+
+    count = np.count_nonzero(strongest_mask & max_st_mask)
+    print(f'count: {count}')
@@ -15,6 +15,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 import networkx as nx
 from scipy.stats import binned_statistic
+import distributions
 
 import os
 if not os.path.isdir("image_1"):
@@ -109,7 +110,8 @@ def plot_ccdf(datavecs, labels, xlabel, ylabel, num, path):
 
     Parameters
     -----------
-    datavecs: data vectors to plot, a list of iterables
+    datavecs: data vectors to plot, a list of iterables or of quantile
+        sketches from distributions.quantile_sketch
     labels: labels for the data vectors, list of strings
     styles = styles in which plot the distributions, list of strings
     xlabel: x label for the figure, string
@@ -122,15 +124,11 @@ def plot_ccdf(datavecs, labels, xlabel, ylabel, num, path):
     ax = fig.add_subplot(111)
     for datavec, label, style in zip(datavecs,labels, styles):
         #TODO: calculate 1-CDF of datavec and plot it with ax.loglog()
-        sorted_datavec = sorted(datavec)
-        N = len(sorted_datavec)
-        ccdf = np.zeros(N)
-
-        for i, val in enumerate(sorted_datavec):
-            for el in sorted_datavec:
-                ccdf[i] += (el >= val)
-            ccdf[i] /= N
-        ax.plot(sorted_datavec, ccdf, style, label=label)     
+        if isinstance(datavec, dict):
+            values, ccdf = distributions.sketch_ccdf(datavec)
+        else:
+            values, ccdf = distributions.ccdf(datavec)
+        ax.plot(values, ccdf, style, label=label)
 
     ax.set_xscale('log')
     ax.set_yscale('log')        
@@ -223,6 +221,15 @@ if __name__ == '__main__':
     ax.set_yscale('log')
     fig.savefig(path)
     print('1-CDF figure saved to ' + path)
+
+    # For link weights too many to sort in memory, the 1-CDF and quantiles
+    # can be read off a sketch built from the edge list in chunks
+    sketch = distributions.sketch_from_chunks(
+        distributions.edge_weight_chunks(network_path), relative_accuracy=0.01)
+    qs = np.array([0.5, 0.9, 0.99])
+    exact_quantiles = np.sort(weights)[(qs * (len(weights) - 1)).astype(int)]
+    print('Weight quantiles ' + str(qs) + ': exact ' + str(exact_quantiles) +
+          ', sketch ' + str(distributions.sketch_quantile(sketch, qs)))
     
     # 1b: average link weight per node
     av_weight = degrees = [strength/degree for strength, degree 